@@ -0,0 +1,79 @@
+"""Benchmark of node value evaluation for day 08 of the Advent of Code.
+
+A chain of nodes where each node references its only child twice has a root
+value of 2 ** depth. Evaluating a child once per reference therefore visits
+2 ** depth nodes, while evaluating each node once visits depth + 1 nodes.
+
+Run this command from the root of the repository:
+
+    python3 benchmarks/day08_node_value.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..'))
+
+from solutions import day08  # pylint: disable=C0413
+
+
+def generate_input(depth: int, references: int = 2) -> str:
+    """Generates a chain of nodes that reference their child repeatedly.
+
+    Args:
+        depth: The number of nodes with a child.
+        references: The number of times each node references its child.
+
+    Returns:
+        A puzzle input whose root node has a value of references ** depth.
+    """
+    headers = [f'1 {references}'] * depth + ['0 1']
+    metadata = ['1'] * (references * depth + 1)
+    return ' '.join(headers + metadata)
+
+
+def _get_node_value_per_reference(node: day08.Node) -> int:
+    """Computes the value of a node, evaluating a child once per reference."""
+    value = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if not node.children:
+            value += sum(node.metadata)
+        else:
+            stack.extend(node.children[index - 1]
+                         for index in node.metadata
+                         if 0 <= index - 1 < len(node.children))
+    return value
+
+
+def main() -> None:
+    """Prints the time taken by each evaluation for increasing depths."""
+    print(f'{"depth":>5} {"per reference":>14} {"memoized":>10} '
+          f'{"compact":>10}')
+    for depth in range(4, 21, 4):
+        input_string = generate_input(depth)
+        tree = day08._build_tree(  # pylint: disable=W0212
+            day08._read_numbers(input_string))  # pylint: disable=W0212
+        compact_tree = day08.CompactTree.load(tree.numbers)
+        per_reference = min(
+            timeit.repeat(lambda: _get_node_value_per_reference(tree),
+                          number=1,
+                          repeat=3))
+        memoized = min(
+            timeit.repeat(
+                lambda: day08._get_node_value(tree),  # pylint: disable=W0212
+                number=1,
+                repeat=3))
+        compact = min(
+            timeit.repeat(lambda: compact_tree.node_values()[0],
+                          number=1,
+                          repeat=3))
+        print(f'{depth:>5} {per_reference:>13.6f}s {memoized:>9.6f}s '
+              f'{compact:>9.6f}s')
+
+
+if __name__ == '__main__':
+    main()
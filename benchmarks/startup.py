@@ -0,0 +1,61 @@
+"""Benchmark of the time taken to import each solution.
+
+Each module is imported in a fresh interpreter with Python's -X importtime
+option, which reports the time spent importing every module, including the
+modules it imports in turn.
+
+Run this command from the root of the repository:
+
+    python3 benchmarks/startup.py
+"""
+
+import os
+import subprocess
+import sys
+from typing import Dict
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+sys.path.insert(0, _ROOT)
+
+import solutions  # pylint: disable=C0413
+
+
+def measure_import(module: str) -> Dict[str, int]:
+    """Imports a module in a fresh interpreter.
+
+    Args:
+        module: The fully qualified name of the module.
+
+    Returns:
+        A dictionary that maps each module imported along the way to its
+        cumulative import time in microseconds.
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=_ROOT,
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main(repeat: int = 5) -> None:
+    """Prints the best cumulative import time of each solution."""
+    print(f'{"module":<18} {"time":>9} {"modules":>8}')
+    for name in ['solutions'] + [
+            f'solutions.{name}' for name in solutions.__all__
+    ]:
+        runs = [measure_import(name) for _ in range(repeat)]
+        best = min(runs, key=lambda times, name=name: times[name])
+        print(f'{name:<18} {best[name] / 1000:>7.2f}ms {len(best):>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""My solutions to the Advent of Code.
+
+Each day's solution is a submodule, for example solutions.day08. Submodules are
+only imported when first accessed, so importing this package is cheap no matter
+how many days it contains:
+
+    import solutions
+    solutions.day08.get_root_value(solutions.utils.read_input(8))
+"""
+
+import importlib
+from types import ModuleType
+
+__all__ = [
+    'backends', 'batch', 'cache', 'day01', 'day02', 'day03', 'day04', 'day05',
+    'day06', 'day07', 'day08', 'differential', 'memory', 'utils'
+]
+
+
+def __getattr__(name: str) -> ModuleType:
+    """Imports a submodule the first time it is accessed.
+
+    Typing is not imported here, since it takes longer to import than the rest
+    of the package.
+    """
+    if name not in __all__:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    return importlib.import_module(f'.{name}', __name__)
+
+
+def __dir__() -> list:
+    """Lists attributes, including submodules that are not imported yet."""
+    return sorted(list(globals()) + __all__)
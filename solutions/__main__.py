@@ -0,0 +1,47 @@
+"""Prints answers to the Advent of Code, optionally testing solutions first.
+
+Run this command from the root of the repository:
+
+    python3 -m solutions [--test] [DAY ...]
+
+Without any day, all days are solved.
+"""
+
+import argparse
+import importlib
+
+from . import __all__ as _MODULES
+
+_DAYS = [int(name[3:]) for name in _MODULES if name.startswith('day')]
+
+
+def main() -> None:
+    """Tests solutions and prints answers to the requested days' puzzles."""
+    parser = argparse.ArgumentParser(prog='python3 -m solutions',
+                                     description=__doc__.split('\n')[0])
+    parser.add_argument('days',
+                        metavar='DAY',
+                        type=int,
+                        nargs='*',
+                        help='a day to solve, defaults to all days')
+    parser.add_argument('--test',
+                        action='store_true',
+                        help="run each day's tests before solving it")
+    args = parser.parse_args()
+    for day in args.days:
+        if day not in _DAYS:
+            parser.error(f'no solution for day {day}')
+    if args.test:
+        for name in _MODULES:
+            module = importlib.import_module(f'.{name}', __package__)
+            if not name.startswith('day') and hasattr(module, '_run_tests'):
+                module._run_tests()  # pylint: disable=W0212
+    for day in args.days or _DAYS:
+        solution = importlib.import_module(f'.day{day:02d}', __package__)
+        if args.test:
+            solution._run_tests()  # pylint: disable=W0212
+        solution.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Selects the implementation of the hot kernels of solutions.
+
+Kernels such as day 03's _count_claims_per_square have a pure Python
+implementation and a NumPy one. All kernels use the same backend, chosen by a
+single setting:
+
+    AOC_BACKEND: Either 'python' or 'numpy'. Defaults to 'numpy'.
+
+The setting can be overridden temporarily with the use context manager, which
+only applies to the current thread or task. When NumPy is not installed, the
+'numpy' backend falls back to 'python'.
+"""
+
+import contextlib
+import contextvars
+import os
+from typing import Callable, Dict, Iterator, List
+
+from . import utils
+
+PYTHON = 'python'
+NUMPY = 'numpy'
+BACKENDS = (PYTHON, NUMPY)
+
+_BACKEND_VARIABLE = 'AOC_BACKEND'
+
+_override = contextvars.ContextVar('override', default=None)
+
+
+def _check(backend: str) -> None:
+    """Raises a ValueError if the backend is unknown."""
+    if backend not in BACKENDS:
+        raise ValueError(f'unknown backend: {backend}')
+
+
+def get_backend() -> str:
+    """Provides the backend to use, after falling back if needed.
+
+    Returns:
+        The name of the backend.
+
+    Raises:
+        ValueError: The backend set is unknown.
+    """
+    backend = _override.get() or os.environ.get(_BACKEND_VARIABLE, NUMPY)
+    _check(backend)
+    if backend == NUMPY and utils.get_numpy() is None:
+        return PYTHON
+    return backend
+
+
+def get_available_backends() -> List[str]:
+    """Lists the backends that can be used without falling back."""
+    if utils.get_numpy() is None:
+        return [PYTHON]
+    return list(BACKENDS)
+
+
+@contextlib.contextmanager
+def use(backend: str) -> Iterator[None]:
+    """Sets the backend inside a with statement.
+
+    Args:
+        backend: The name of the backend.
+
+    Raises:
+        ValueError: The backend is unknown.
+    """
+    _check(backend)
+    token = _override.set(backend)
+    try:
+        yield
+    finally:
+        _override.reset(token)
+
+
+def select(implementations: Dict[str, Callable]) -> Callable:
+    """Selects the implementation of a kernel for the current backend.
+
+    Args:
+        implementations: A dictionary that maps backends to implementations of
+            the same kernel. It must contain a 'python' implementation, which
+            is used for any backend without one.
+
+    Returns:
+        The implementation to use.
+    """
+    return implementations.get(get_backend(), implementations[PYTHON])
@@ -0,0 +1,94 @@
+"""Solves a day's puzzle for many inputs at once.
+
+Each day provides a solve function that reads an input once and computes the
+answers to both parts of the puzzle from the same parsed structures, and a
+solve_batch function that runs solve over many inputs through solve_batch
+below.
+"""
+
+import collections
+import os
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
+
+# An input is either the contents of an input file, or the path to one.
+Input = Union[str, os.PathLike]
+
+# The number of inputs submitted ahead of the result being waited for, for each
+# worker of a pool.
+_INPUTS_AHEAD_PER_WORKER = 4
+
+
+def read_input(item: Input) -> str:
+    """Reads an input given either as contents or as a path.
+
+    Args:
+        item: The contents of an input file, or the path to one. Strings are
+            always considered as contents, so paths must be given as
+            os.PathLike objects such as pathlib.Path.
+
+    Returns:
+        The contents of the input file as a string.
+    """
+    if not isinstance(item, os.PathLike):
+        return item
+    with open(item) as inputfile:
+        return inputfile.read().strip()
+
+
+def _solve_item(solve: Callable[[str], Any], item: Input) -> Any:
+    """Reads an input and solves it."""
+    return solve(read_input(item))
+
+
+def solve_batch(solve: Callable[[str], Any],
+                inputs: Iterable[Input],
+                pool: Optional[str] = 'process',
+                workers: Optional[int] = None) -> Iterator[Any]:
+    """Solves a puzzle for many inputs.
+
+    Inputs are read by the workers, so paths are not read in advance. Only a
+    few inputs per worker are submitted ahead of the results being consumed, so
+    that inputs can be an arbitrarily long stream.
+
+    Args:
+        solve: A function that solves the puzzle for the contents of an input.
+            It must be picklable to use a process pool, for instance a
+            module-level function or a functools.partial of one.
+        inputs: The contents of input files, or paths to them.
+        pool: The kind of pool the inputs are solved in, either 'process',
+            'thread', or None to solve them one after the other in the calling
+            thread.
+        workers: The number of workers in the pool. Defaults to the executor's
+            own default.
+
+    Yields:
+        The result of solve for each input, in the order of inputs.
+
+    Raises:
+        ValueError: The pool is unknown.
+    """
+    if pool is None:
+        for item in inputs:
+            yield _solve_item(solve, item)
+        return
+
+    import concurrent.futures  # pylint: disable=C0415
+    executors = {
+        'process': concurrent.futures.ProcessPoolExecutor,
+        'thread': concurrent.futures.ThreadPoolExecutor,
+    }
+    if pool not in executors:
+        raise ValueError(f'unknown pool: {pool}')
+    ahead = _INPUTS_AHEAD_PER_WORKER * (workers or os.cpu_count() or 1)
+    with executors[pool](workers) as executor:
+        pending = collections.deque()
+        try:
+            for item in inputs:
+                pending.append(executor.submit(_solve_item, solve, item))
+                if len(pending) >= ahead:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,385 @@
+"""A persistent cache of the results of solutions.
+
+Results are stored in an SQLite database, keyed by the module and name of the
+function and the SHA-256 digest of its parameters and input. Caching is
+opt-in and configured through environment variables:
+
+    AOC_CACHE_DIR: The directory of the database. Results are only cached when
+        this variable is set.
+    AOC_CACHE_MAX_BYTES: The maximum total size of the cached results, 64 MiB
+        by default. The least recently used results are evicted first.
+    AOC_CACHE_BYPASS: When set to a non-empty value, results are neither read
+        from nor written to the cache.
+
+The cache can also be bypassed temporarily with the bypass context manager.
+
+Keys also contain the SHA-256 digest of the source file of the function's
+module, so results computed by an older version of a solution are not served
+after it changes. Changes to other modules that affect results, such as
+shared helpers, must bump CACHE_VERSION instead.
+
+Results are stored as JSON. Only results made of None, booleans, numbers,
+strings, lists, tuples, and dictionaries with string keys, nested in any way,
+are cached; other results, such as sets, are recomputed on every call. Calls
+with parameters that cannot be represented as JSON are never cached.
+"""
+
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+_DIRECTORY_VARIABLE = 'AOC_CACHE_DIR'
+_MAX_BYTES_VARIABLE = 'AOC_CACHE_MAX_BYTES'
+_BYPASS_VARIABLE = 'AOC_CACHE_BYPASS'
+_DEFAULT_MAX_BYTES = 64 << 20
+_DATABASE_NAME = 'results.sqlite3'
+
+# Bumped when results change without the source of the solution's module
+# changing, for instance after fixing a shared helper.
+CACHE_VERSION = 2
+
+_bypassed = contextvars.ContextVar('bypassed', default=False)
+
+
+class ResultCache:
+    """Represents a size-bounded store of results with LRU eviction.
+
+    Attributes:
+        path: The path to the SQLite database.
+        max_bytes: The maximum total size of the stored values.
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        import sqlite3  # pylint: disable=C0415
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path,
+                                           timeout=30,
+                                           check_same_thread=False,
+                                           isolation_level=None)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                                 'key TEXT PRIMARY KEY, '
+                                 'value TEXT NOT NULL, '
+                                 'size INTEGER NOT NULL, '
+                                 'accessed INTEGER NOT NULL)')
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+
+    def _next_access(self) -> int:
+        """Provides a counter that orders accesses across processes."""
+        row = self._connection.execute(
+            'SELECT COALESCE(MAX(accessed), 0) + 1 FROM results').fetchone()
+        return row[0]
+
+    def get(self, key: str) -> Optional[str]:
+        """Looks up a value, marking it as the most recently used.
+
+        Args:
+            key: The key of the value.
+
+        Returns:
+            The value, or None if it is not in the cache.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                'UPDATE results SET accessed = ? WHERE key = ?',
+                (self._next_access(), key))
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """Stores a value, evicting the least recently used ones if needed.
+
+        Values larger than max_bytes are not stored.
+
+        Args:
+            key: The key of the value.
+            value: The value to store.
+        """
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                    (key, value, size, self._next_access()))
+                self._connection.execute(
+                    'DELETE FROM results WHERE key IN ('
+                    'SELECT key FROM ('
+                    'SELECT key, '
+                    'SUM(size) OVER (ORDER BY accessed DESC) AS total '
+                    'FROM results) WHERE total > ?)', (self.max_bytes,))
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+
+    def clear(self) -> None:
+        """Removes all values."""
+        with self._lock:
+            self._connection.execute('DELETE FROM results')
+
+    def close(self) -> None:
+        """Closes the database."""
+        with self._lock:
+            self._connection.close()
+
+    def total_bytes(self) -> int:
+        """Provides the total size of the stored values."""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM results').fetchone()
+        return row[0]
+
+
+# Open caches, by process ID, database path and maximum size. Processes forked
+# from one with open caches, such as the workers of a process pool, open their
+# own connections instead of sharing their parent's.
+_caches: Dict[Tuple[int, str, int], ResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _reset_caches_lock() -> None:
+    """Replaces the lock of caches, which may be held by another thread when
+    the process forks."""
+    global _caches_lock  # pylint: disable=W0603
+    _caches_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_caches_lock)
+
+
+def get_cache() -> Optional[ResultCache]:
+    """Provides the cache configured by the environment.
+
+    Returns:
+        The cache, or None if caching is disabled or bypassed.
+    """
+    directory = os.environ.get(_DIRECTORY_VARIABLE)
+    if not directory or os.environ.get(_BYPASS_VARIABLE) or _bypassed.get():
+        return None
+    max_bytes = int(os.environ.get(_MAX_BYTES_VARIABLE, _DEFAULT_MAX_BYTES))
+    path = os.path.join(directory, _DATABASE_NAME)
+    key = (os.getpid(), path, max_bytes)
+    with _caches_lock:
+        if key not in _caches:
+            os.makedirs(directory, exist_ok=True)
+            _caches[key] = ResultCache(path, max_bytes)
+        return _caches[key]
+
+
+@functools.lru_cache(maxsize=None)
+def _get_module_digest(module_name: str) -> str:
+    """Provides the SHA-256 digest of the source file of a module.
+
+    Returns:
+        The hexadecimal digest, or an empty string if the module has no source
+        file.
+    """
+    import hashlib  # pylint: disable=C0415
+    path = getattr(sys.modules.get(module_name), '__file__', None)
+    if path is None:
+        return ''
+    with open(path, 'rb') as source_file:
+        return hashlib.sha256(source_file.read()).hexdigest()
+
+
+@contextlib.contextmanager
+def bypass() -> Iterator[None]:
+    """Disables the cache inside a with statement."""
+    token = _bypassed.set(True)
+    try:
+        yield
+    finally:
+        _bypassed.reset(token)
+
+
+def _to_json(value: Any) -> Any:
+    """Converts tuples and dictionaries to tagged JSON objects, recursively.
+
+    Lists and other values are left as is, so that tuples and dictionaries can
+    be told apart from them when decoding.
+    """
+    if isinstance(value, tuple):
+        return {'tuple': [_to_json(item) for item in value]}
+    if isinstance(value, list):
+        return [_to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {'dict': {key: _to_json(item) for key, item in value.items()}}
+    return value
+
+
+def _from_json(value: Any) -> Any:
+    """Reverts _to_json."""
+    if isinstance(value, list):
+        return [_from_json(item) for item in value]
+    if isinstance(value, dict):
+        if 'tuple' in value:
+            return tuple(_from_json(item) for item in value['tuple'])
+        return {key: _from_json(item) for key, item in value['dict'].items()}
+    return value
+
+
+def _encode(result: Any) -> Optional[str]:
+    """Encodes a result as JSON.
+
+    Returns:
+        The encoded result, or None if the result cannot be decoded back to an
+        equal value.
+    """
+    try:
+        encoded = json.dumps(_to_json(result))
+    except (TypeError, ValueError):
+        return None
+    if _decode(encoded) != result:
+        return None
+    return encoded
+
+
+def _decode(encoded: str) -> Any:
+    """Decodes a result encoded by _encode."""
+    return _from_json(json.loads(encoded))
+
+
+def cached(ignore: Iterable[str] = ()) -> Callable[[Callable], Callable]:
+    """Caches the results of a function taking an input_string parameter.
+
+    Args:
+        ignore: The names of parameters that do not change results, such as a
+            number of processes, and are left out of the key.
+
+    Returns:
+        A decorator for the function.
+    """
+    ignore = frozenset(ignore)
+
+    def decorator(function: Callable) -> Callable:
+        signature = None
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            nonlocal signature
+            result_cache = get_cache()
+            if result_cache is None:
+                return function(*args, **kwargs)
+
+            import hashlib  # pylint: disable=C0415
+            import inspect  # pylint: disable=C0415
+            if signature is None:
+                signature = inspect.signature(function)
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            parameters = dict(arguments.arguments)
+            input_string = parameters.pop('input_string')
+            for name in ignore:
+                parameters.pop(name, None)
+            try:
+                encoded_parameters = json.dumps(parameters, sort_keys=True)
+            except (TypeError, ValueError):
+                return function(*args, **kwargs)
+            # Parameters are hashed rather than stored, since some, such as
+            # the lines of a file, are as large as the input.
+            digest = hashlib.sha256(encoded_parameters.encode())
+            digest.update(b'\0')
+            digest.update(input_string.encode())
+            key = (f'{function.__module__}.{function.__qualname__}:'
+                   f'{CACHE_VERSION}:{_get_module_digest(function.__module__)}:'
+                   f'{digest.hexdigest()}')
+
+            encoded = result_cache.get(key)
+            if encoded is not None:
+                return _decode(encoded)
+            result = function(*args, **kwargs)
+            encoded = _encode(result)
+            if encoded is not None:
+                result_cache.put(key, encoded)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _run_tests() -> None:
+    """Tests the cache."""
+    global CACHE_VERSION  # pylint: disable=W0603
+    import tempfile  # pylint: disable=C0415
+    calls = []
+
+    @cached(ignore=['processes'])
+    def get_answer(input_string: str, offset: int = 0, processes: int = 1):
+        calls.append((input_string, offset, processes))
+        return len(input_string) + offset, [offset]
+
+    for result in [(1, 'a'), [(1, [2.5]), (None, True)], {'a': (1,)}, []]:
+        assert _decode(_encode(result)) == result
+        assert type(_decode(_encode(result))) is type(result)
+    assert _encode({1: 2}) is None and _encode({1}) is None
+
+    environment, version = dict(os.environ), CACHE_VERSION
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            os.environ.pop(_BYPASS_VARIABLE, None)
+            os.environ.pop(_DIRECTORY_VARIABLE, None)
+            assert get_answer('abc') == (3, [0])
+            assert get_answer('abc') == (3, [0])
+            assert len(calls) == 2
+            os.environ[_DIRECTORY_VARIABLE] = directory
+            assert get_answer('abc') == (3, [0])
+            assert get_answer('abc', processes=4) == (3, [0])
+            assert get_answer(input_string='abc', offset=0) == (3, [0])
+            assert len(calls) == 3
+            assert get_answer('abc', 1) == (4, [1])
+            assert len(calls) == 4
+            with bypass():
+                assert get_answer('abc') == (3, [0])
+            assert len(calls) == 5
+            os.environ[_MAX_BYTES_VARIABLE] = str(
+                get_cache().total_bytes() * 5 // 4)
+            get_answer('abc', 1)
+            get_answer('abcd')
+            assert get_cache().total_bytes() <= get_cache().max_bytes
+            del calls[:]
+            get_answer('abc', 1)
+            get_answer('abc')
+            assert calls == [('abc', 0, 1)]
+            CACHE_VERSION += 1
+            get_answer('abc')
+            assert calls == [('abc', 0, 1), ('abc', 0, 1)]
+            # Keys stay small however large the parameters are.
+            get_answer('abc', 10**4000)
+            connection = get_cache()._connection  # pylint: disable=W0212
+            assert all(len(key) < 200 for key, in connection.execute(
+                'SELECT key FROM results'))
+            assert all(key[0] == os.getpid() for key in _caches)
+            get_cache().clear()
+            assert get_cache().total_bytes() == 0
+    finally:
+        CACHE_VERSION = version
+        os.environ.clear()
+        os.environ.update(environment)
+        with _caches_lock:
+            for result_cache in _caches.values():
+                result_cache.close()
+            _caches.clear()
+
+
+def main() -> None:
+    """Runs tests."""
+    _run_tests()
+
+
+if __name__ == '__main__':
+    main()
@@ -22,11 +22,12 @@ Part 2:
     slower!). See get_first_repetition function.
 """
 
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-import utils
+from . import batch, cache, memory, utils
 
 
+@memory.phase('parse')
 def _read_changes(input_string: str) -> List[int]:
     """Reads frequency changes from a given input string.
 
@@ -52,32 +53,32 @@ def _apply_change(frequency: int, change: int) -> int:
     return frequency + change
 
 
-def get_final_frequency(input_string: str) -> int:
-    """Computes the final frequency given an input string.
+@memory.phase('compute')
+def _get_final_frequency(changes: List[int]) -> int:
+    """Computes the final frequency given a list of changes.
 
     Args:
-        input_string: The puzzle input.
+        changes: A list of integers representing changes.
 
     Returns:
         The final frequency after applying all changes.
     """
-    changes = _read_changes(input_string)
     frequency = 0
     for change in changes:
         frequency = _apply_change(frequency, change)
     return frequency
 
 
-def get_first_repetition(input_string: str) -> int:
-    """Finds the first repetition given an input string.
+@memory.phase('compute')
+def _get_first_repetition(changes: List[int]) -> int:
+    """Finds the first repetition given a list of changes.
 
     Args:
-        input_string: The puzzle input.
+        changes: A list of integers representing changes.
 
     Returns:
         The first frequency to appear twice.
     """
-    changes = _read_changes(input_string)
     frequency = 0
     seen_frequencies = {frequency}
     while True:
@@ -88,6 +89,67 @@ def get_first_repetition(input_string: str) -> int:
             seen_frequencies.add(frequency)
 
 
+@cache.cached()
+@memory.measured
+def get_final_frequency(input_string: str) -> int:
+    """Computes the final frequency given an input string.
+
+    Args:
+        input_string: The puzzle input.
+
+    Returns:
+        The final frequency after applying all changes.
+    """
+    return _get_final_frequency(_read_changes(input_string))
+
+
+@cache.cached()
+@memory.measured
+def get_first_repetition(input_string: str) -> int:
+    """Finds the first repetition given an input string.
+
+    Args:
+        input_string: The puzzle input.
+
+    Returns:
+        The first frequency to appear twice.
+    """
+    return _get_first_repetition(_read_changes(input_string))
+
+
+@cache.cached()
+@memory.measured
+def solve(input_string: str) -> Tuple[int, int]:
+    """Solves both parts of the day's puzzle, reading the input once.
+
+    Args:
+        input_string: The puzzle input.
+
+    Returns:
+        The final frequency and the first repetition.
+    """
+    changes = _read_changes(input_string)
+    return _get_final_frequency(changes), _get_first_repetition(changes)
+
+
+def solve_batch(inputs: Iterable[batch.Input],
+                pool: Optional[str] = 'process',
+                workers: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """Solves both parts of the day's puzzle for many inputs.
+
+    See batch.solve_batch for details.
+
+    Args:
+        inputs: The puzzle inputs, or paths to them.
+        pool: The kind of pool the inputs are solved in.
+        workers: The number of workers in the pool.
+
+    Yields:
+        The answers to both parts of the puzzle for each input, in order.
+    """
+    return batch.solve_batch(solve, inputs, pool, workers)
+
+
 def _run_tests() -> None:
     """Tests solution."""
     assert get_final_frequency('+1\n+1\n+1') == 3
@@ -97,6 +159,9 @@ def _run_tests() -> None:
     assert get_first_repetition('+3\n+3\n+4\n-2\n-4') == 10
     assert get_first_repetition('-6\n+3\n+8\n+5\n-6') == 5
     assert get_first_repetition('+7\n+7\n-2\n-7\n-4') == 14
+    assert list(
+        solve_batch(['+1\n-1', '+1\n+1\n-2', '+3\n+3\n+4\n-2\n-4'],
+                    pool='thread')) == [(0, 0), (0, 0), (4, 10)]
 
 
 def _print_answers(final_frequency: int = None,
@@ -113,11 +178,8 @@ def _print_answers(final_frequency: int = None,
 
 
 def main() -> None:
-    """Runs tests and prints answers to day's puzzle."""
-    _run_tests()
-    input_string = utils.read_input(1)
-    final_frequency = get_final_frequency(input_string)
-    first_repetition = get_first_repetition(input_string)
+    """Prints answers to day's puzzle."""
+    final_frequency, first_repetition = solve(utils.read_input(1))
     _print_answers(final_frequency, first_repetition)
 
 
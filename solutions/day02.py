@@ -13,7 +13,14 @@ Counting letters:
 Part 1:
     Computing the checksum is only a question of counting how many words have a
     2 or 3 in the values of the dictionary returned by _count_letters. See
-    get_checksum function.
+    _count_ids_with_repeats_python and get_checksum functions.
+
+Counting letters with NumPy:
+    Box IDs are short, so counting the letters of one ID at a time with NumPy
+    would be slower than with a dictionary. Instead, when all IDs have the same
+    length, we stack them in a matrix with one row per ID, number the distinct
+    letters, and count the letters of all IDs at once with numpy.bincount. See
+    _count_ids_with_repeats_numpy function and the backends module.
 
 Letters in common:
     Using list comprehensions, we can build a list of the letters any two box
@@ -34,11 +41,12 @@ Part 2:
 """
 
 import itertools
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-import utils
+from . import backends, batch, cache, memory, utils
 
 
+@memory.phase('parse')
 def _read_box_ids(input_string: str) -> List[str]:
     """Reads box IDs from a given input string.
 
@@ -102,16 +110,16 @@ def _similar_box_ids(box_ids: List[str]) -> Tuple[str, str]:
     return None
 
 
-def get_checksum(input_string: str) -> int:
-    """Computes the checksum given an input string.
+def _count_ids_with_repeats_python(box_ids: List[str]) -> Tuple[int, int]:
+    """Counts the box IDs with a letter appearing exactly two or three times.
 
     Args:
-        input_string: The puzzle input.
+        box_ids: A list of box IDs.
 
     Returns:
-        The checksum.
+        The number of box IDs with a letter appearing exactly twice and the
+        number of box IDs with a letter appearing exactly three times.
     """
-    box_ids = _read_box_ids(input_string)
     ids_with_two, ids_with_three = 0, 0
     for box_id in box_ids:
         letter_count = _count_letters(box_id)
@@ -119,9 +127,87 @@ def get_checksum(input_string: str) -> int:
             ids_with_two += 1
         if 3 in letter_count.values():
             ids_with_three += 1
+    return ids_with_two, ids_with_three
+
+
+def _count_ids_with_repeats_numpy(box_ids: List[str]) -> Tuple[int, int]:
+    """Counts the box IDs with a letter appearing exactly two or three times.
+
+    Falls back to _count_ids_with_repeats_python if IDs have different lengths.
+
+    Args:
+        box_ids: A list of box IDs.
+
+    Returns:
+        The number of box IDs with a letter appearing exactly twice and the
+        number of box IDs with a letter appearing exactly three times.
+    """
+    length = len(box_ids[0]) if box_ids else 0
+    if not length or any(len(box_id) != length for box_id in box_ids):
+        return _count_ids_with_repeats_python(box_ids)
+    np = utils.get_numpy()
+    letters = np.frombuffer(''.join(box_ids).encode('utf-32-le'),
+                            dtype=np.uint32)
+    alphabet, letter_ids = np.unique(letters, return_inverse=True)
+    rows = np.repeat(np.arange(len(box_ids)), length)
+    counts = np.bincount(rows * alphabet.size + letter_ids,
+                         minlength=len(box_ids) * alphabet.size).reshape(
+                             len(box_ids), alphabet.size)
+    return (int(np.count_nonzero((counts == 2).any(axis=1))),
+            int(np.count_nonzero((counts == 3).any(axis=1))))
+
+
+_COUNT_IDS_WITH_REPEATS_BACKENDS = {
+    backends.PYTHON: _count_ids_with_repeats_python,
+    backends.NUMPY: _count_ids_with_repeats_numpy,
+}
+
+
+@memory.phase('compute')
+def _get_checksum(box_ids: List[str]) -> int:
+    """Computes the checksum given a list of box IDs.
+
+    Args:
+        box_ids: A list of box IDs.
+
+    Returns:
+        The checksum.
+    """
+    ids_with_two, ids_with_three = backends.select(
+        _COUNT_IDS_WITH_REPEATS_BACKENDS)(box_ids)
     return ids_with_two * ids_with_three
 
 
+@memory.phase('compute')
+def _get_similar_box_ids_overlap(box_ids: List[str]) -> str:
+    """Finds the common letters in the correct box IDs given a list of box IDs.
+
+    Args:
+        box_ids: A list of box IDs.
+
+    Returns:
+        The common letters.
+    """
+    correct_box_ids = _similar_box_ids(box_ids)
+    return ''.join(_letters_in_common(*correct_box_ids))
+
+
+@cache.cached()
+@memory.measured
+def get_checksum(input_string: str) -> int:
+    """Computes the checksum given an input string.
+
+    Args:
+        input_string: The puzzle input.
+
+    Returns:
+        The checksum.
+    """
+    return _get_checksum(_read_box_ids(input_string))
+
+
+@cache.cached()
+@memory.measured
 def get_similar_box_ids_overlap(input_string: str) -> str:
     """Finds the common letters in the correct box IDs given an input string.
 
@@ -131,9 +217,40 @@ def get_similar_box_ids_overlap(input_string: str) -> str:
     Returns:
         The common letters.
     """
+    return _get_similar_box_ids_overlap(_read_box_ids(input_string))
+
+
+@cache.cached()
+@memory.measured
+def solve(input_string: str) -> Tuple[int, str]:
+    """Solves both parts of the day's puzzle, reading the input once.
+
+    Args:
+        input_string: The puzzle input.
+
+    Returns:
+        The checksum and the common letters in the correct box IDs.
+    """
     box_ids = _read_box_ids(input_string)
-    correct_box_ids = _similar_box_ids(box_ids)
-    return ''.join(_letters_in_common(*correct_box_ids))
+    return _get_checksum(box_ids), _get_similar_box_ids_overlap(box_ids)
+
+
+def solve_batch(inputs: Iterable[batch.Input],
+                pool: Optional[str] = 'process',
+                workers: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """Solves both parts of the day's puzzle for many inputs.
+
+    See batch.solve_batch for details.
+
+    Args:
+        inputs: The puzzle inputs, or paths to them.
+        pool: The kind of pool the inputs are solved in.
+        workers: The number of workers in the pool.
+
+    Yields:
+        The answers to both parts of the puzzle for each input, in order.
+    """
+    return batch.solve_batch(solve, inputs, pool, workers)
 
 
 def _run_tests() -> None:
@@ -142,6 +259,9 @@ def _run_tests() -> None:
         'abcdef\nbababc\nabbcde\nabcccd\naabcdd\nabcdee\nababab') == 12
     assert get_similar_box_ids_overlap(
         'abcde\nfghij\nklmno\npqrst\nfguij\naxcye\nwvxyz') == 'fgij'
+    assert list(
+        solve_batch(['abcde\nabcdd\nbbcde', 'abbcd\naaacd\nabbcx'],
+                    pool=None)) == [(0, 'abcd'), (2, 'abbc')]
 
 
 def _print_answers(checksum: int = None, common_letters: str = None) -> None:
@@ -157,11 +277,8 @@ def _print_answers(checksum: int = None, common_letters: str = None) -> None:
 
 
 def main() -> None:
-    """Runs tests and prints answers to day's puzzle."""
-    _run_tests()
-    input_string = utils.read_input(2)
-    checksum = get_checksum(input_string)
-    letters_in_common = get_similar_box_ids_overlap(input_string)
+    """Prints answers to day's puzzle."""
+    checksum, letters_in_common = solve(utils.read_input(2))
     _print_answers(checksum, letters_in_common)
 
 
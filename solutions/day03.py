@@ -9,10 +9,19 @@ Reading input:
 Number of claims per square:
     In order to count the number of times any square inch of fabric has been
     claimed, we build a matrix of zeros representing the square inches of
-    fabric. For each claim, we increment the values of each of the squares in
-    the claim's area. This builds a matrix where each cell contains the number
-    of times the corresponding square inch has been claimed. See
-    _count_claims_per_square function.
+    fabric, stored as a single flat array of C integers in row-major order.
+    For each claim, we increment the values of each of the squares in the
+    claim's area. This builds a matrix where each cell contains the number of
+    times the corresponding square inch has been claimed. See
+    _count_claims_per_square_python function.
+
+Number of claims per square with NumPy:
+    With NumPy, each claim only touches the four corners of its area in a
+    matrix of differences: +1 at its top-left corner, -1 right of its top-right
+    and below its bottom-left corners, and +1 diagonally past its bottom-right
+    corner. Cumulative sums along both axes then turn those differences into the
+    number of claims of each square inch. See _count_claims_per_square_numpy
+    function and the backends module.
 
 Part 1:
     Once we have the number of times each square inch of fabric has been
@@ -29,13 +38,44 @@ Part 2:
     After counting the number of claims for each square inch, we can check each
     claim to find the one that overlaps with no other and obtain its ID. See
     get_intact_claim_id function.
+
+Overclaimed squares without a matrix:
+    Going down the fabric row by row, the claims covering a row are those that
+    started above it and have not ended yet. Sorting the left and right edges
+    of those claims and sweeping across the row tells how many claims cover
+    each stretch of the row, so the squares with two claims or more can be
+    counted without storing anything per square. The count of a row only
+    changes when a claim starts or ends on it. See
+    _count_overclaimed_squares_sweep function.
+
+Intact claim without a matrix:
+    Two claims overlap when their areas intersect both horizontally and
+    vertically. Going through the claims from left to right, a claim can only
+    intersect the claims to its left that have not ended before its left edge.
+    See _get_intact_claim_id_sweep function.
+
+Memory budget:
+    The matrix covers the whole fabric no matter how small the claims are, and
+    takes several megabytes. Its size is checked against the memory budget set
+    for the memory module before it is built. When it does not fit, both parts
+    are answered without a matrix instead. See _try_count_claims_per_square
+    function.
 """
 
-import itertools
+import collections
 import re
-from typing import List, NamedTuple
+from array import array
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from . import backends, batch, cache, memory, utils
+
+# The width and height of the fabric in inches.
+_FABRIC_SIZE = 1000
 
-import utils
+# The memory used by the NumPy kernel for each square inch: the matrix of
+# differences, its cumulative sums in place, the bytes of the counts, and the
+# counts themselves.
+_NUMPY_BYTES_PER_SQUARE = 12
 
 
 class AreaClaim(NamedTuple):  # pylint: disable=R0903
@@ -57,6 +97,7 @@ class AreaClaim(NamedTuple):  # pylint: disable=R0903
     height: int
 
 
+@memory.phase('parse')
 def _read_claims(input_string: str) -> List[AreaClaim]:
     """Reads area claims from a given input string.
 
@@ -73,24 +114,91 @@ def _read_claims(input_string: str) -> List[AreaClaim]:
     ]
 
 
-def _count_claims_per_square(claims: List[AreaClaim]) -> List[List[int]]:
+def _count_claims_per_square_python(claims: List[AreaClaim]) -> array:
     """Counts the number of claims for each square inch of fabric.
 
     Args:
         claims: A list of claims on areas of fabric.
 
     Returns:
-        A matrix of the number of claims for each square inch of fabric.
+        A flat array of the number of claims for each square inch of fabric,
+        in row-major order.
     """
-    square_claims = [[0 for i in range(1000)] for j in range(1000)]
+    memory.reserve(4 * _FABRIC_SIZE * _FABRIC_SIZE)
+    square_claims = array('i', [0]) * (_FABRIC_SIZE * _FABRIC_SIZE)
     for claim in claims:
         for row in range(claim.y, claim.y + claim.height):
-            for col in range(claim.x, claim.x + claim.width):
-                square_claims[row][col] += 1
+            start = row * _FABRIC_SIZE + claim.x
+            for cell in range(start, start + claim.width):
+                square_claims[cell] += 1
+    return square_claims
+
+
+def _count_claims_per_square_numpy(claims: List[AreaClaim]) -> array:
+    """Counts the number of claims for each square inch of fabric.
+
+    Args:
+        claims: A list of claims on areas of fabric.
+
+    Returns:
+        A flat array of the number of claims for each square inch of fabric,
+        in row-major order.
+    """
+    np = utils.get_numpy()
+    memory.reserve(_NUMPY_BYTES_PER_SQUARE * _FABRIC_SIZE * _FABRIC_SIZE)
+    differences = np.zeros((_FABRIC_SIZE + 1, _FABRIC_SIZE + 1),
+                           dtype=np.int32)
+    if claims:
+        _, x, y, width, height = np.array(claims, dtype=np.intp).T
+        np.add.at(differences, (y, x), 1)
+        np.add.at(differences, (y, x + width), -1)
+        np.add.at(differences, (y + height, x), -1)
+        np.add.at(differences, (y + height, x + width), 1)
+    np.cumsum(differences, axis=0, out=differences)
+    np.cumsum(differences, axis=1, out=differences)
+    square_claims = array('i')
+    square_claims.frombytes(
+        differences[:_FABRIC_SIZE, :_FABRIC_SIZE].tobytes())
     return square_claims
 
 
-def _claim_overlaps(claim: AreaClaim, square_claims: List[List[int]]) -> bool:
+_COUNT_CLAIMS_PER_SQUARE_BACKENDS = {
+    backends.PYTHON: _count_claims_per_square_python,
+    backends.NUMPY: _count_claims_per_square_numpy,
+}
+
+
+@memory.phase('build')
+def _count_claims_per_square(claims: List[AreaClaim]) -> array:
+    """Counts the claims of each square inch with the current backend.
+
+    Args:
+        claims: A list of claims on areas of fabric.
+
+    Returns:
+        A flat array of the number of claims for each square inch of fabric,
+        in row-major order.
+    """
+    return backends.select(_COUNT_CLAIMS_PER_SQUARE_BACKENDS)(claims)
+
+
+def _try_count_claims_per_square(claims: List[AreaClaim]) -> Optional[array]:
+    """Counts the claims of each square inch if it fits in the memory budget.
+
+    Args:
+        claims: A list of claims on areas of fabric.
+
+    Returns:
+        A flat array of the number of claims for each square inch of fabric,
+        or None if it exceeds the memory budget.
+    """
+    try:
+        return _count_claims_per_square(claims)
+    except memory.MemoryBudgetExceeded:
+        return None
+
+
+def _claim_overlaps(claim: AreaClaim, square_claims: array) -> bool:
     """Checks whether the given claim overlaps with any other claim.
 
     Args:
@@ -101,12 +209,121 @@ def _claim_overlaps(claim: AreaClaim, square_claims: List[List[int]]) -> bool:
         Whether the claim is the only one to affect the squares it contains.
     """
     for row in range(claim.y, claim.y + claim.height):
-        for col in range(claim.x, claim.x + claim.width):
-            if square_claims[row][col] > 1:
-                return True
+        start = row * _FABRIC_SIZE + claim.x
+        if max(square_claims[start:start + claim.width], default=0) > 1:
+            return True
     return False
 
 
+@memory.phase('compute')
+def _count_overclaimed_squares(claims_per_square: array) -> int:
+    """Counts the number of square inches that have overlapping claims.
+
+    Args:
+        claims_per_square: The number of claims for each square inch of fabric.
+
+    Returns:
+        The number of square inches that have overlapping claims.
+    """
+    return sum([1 for count in claims_per_square if count >= 2])
+
+
+@memory.phase('compute')
+def _get_intact_claim_id(claims: List[AreaClaim],
+                         claims_per_square: array) -> int:
+    """Finds the ID of the only claim that does not overlap.
+
+    Args:
+        claims: A list of claims on areas of fabric.
+        claims_per_square: The number of claims for each square inch of fabric.
+
+    Returns:
+        The ID of the only claim that does not overlap.
+    """
+    for claim in claims:
+        if not _claim_overlaps(claim, claims_per_square):
+            return claim.id
+    return None
+
+
+def _count_overclaimed_row(claims: Iterable[AreaClaim]) -> int:
+    """Counts the squares of a row covered by two claims or more.
+
+    Args:
+        claims: The claims covering the row.
+
+    Returns:
+        The number of squares of the row covered by two claims or more.
+    """
+    edges = sorted(
+        [(claim.x, 1) for claim in claims] +
+        [(claim.x + claim.width, -1) for claim in claims])
+    overclaimed, covering, previous = 0, 0, 0
+    for col, change in edges:
+        if covering >= 2:
+            overclaimed += col - previous
+        covering += change
+        previous = col
+    return overclaimed
+
+
+@memory.phase('compute')
+def _count_overclaimed_squares_sweep(claims: List[AreaClaim]) -> int:
+    """Counts the number of square inches that have overlapping claims.
+
+    Sweeps the fabric row by row, without a matrix.
+
+    Args:
+        claims: A list of claims on areas of fabric.
+
+    Returns:
+        The number of square inches that have overlapping claims.
+    """
+    starting = collections.defaultdict(list)
+    ending = collections.defaultdict(list)
+    for claim in claims:
+        starting[claim.y].append(claim)
+        ending[claim.y + claim.height].append(claim)
+    rows = sorted(starting.keys() | ending.keys())
+    overclaimed, active = 0, set()
+    for row, next_row in zip(rows, rows[1:]):
+        active.difference_update(ending[row])
+        active.update(starting[row])
+        overclaimed += (next_row - row) * _count_overclaimed_row(active)
+    return overclaimed
+
+
+@memory.phase('compute')
+def _get_intact_claim_id_sweep(claims: List[AreaClaim]) -> int:
+    """Finds the ID of the only claim that does not overlap.
+
+    Sweeps the claims from left to right, without a matrix.
+
+    Args:
+        claims: A list of claims on areas of fabric.
+
+    Returns:
+        The ID of the only claim that does not overlap.
+    """
+    overlapping = set()
+    active = []
+    for claim in sorted(claims, key=lambda claim: claim.x):
+        active = [
+            other for other in active if other.x + other.width > claim.x
+        ]
+        for other in active:
+            if (other.y < claim.y + claim.height and
+                    claim.y < other.y + other.height):
+                overlapping.update((other.id, claim.id))
+        active.append(claim)
+    for claim in claims:
+        if claim.id not in overlapping:
+            return claim.id
+    return None
+
+
+@cache.cached()
+@memory.measured
 def count_overclaimed_squares(input_string: str) -> int:
     """Counts the number of square inches that have overlapping claims.
 
@@ -117,12 +334,14 @@ def count_overclaimed_squares(input_string: str) -> int:
         The number of square inches that have overlapping claims.
     """
     claims = _read_claims(input_string)
-    claims_per_square = _count_claims_per_square(claims)
-    overlaps = sum(
-        [1 for count in itertools.chain(*claims_per_square) if count >= 2])
-    return overlaps
+    claims_per_square = _try_count_claims_per_square(claims)
+    if claims_per_square is None:
+        return _count_overclaimed_squares_sweep(claims)
+    return _count_overclaimed_squares(claims_per_square)
 
 
+@cache.cached()
+@memory.measured
 def get_intact_claim_id(input_string: str) -> int:
     """Finds the ID of the only claim that does not overlap.
 
@@ -133,11 +352,52 @@ def get_intact_claim_id(input_string: str) -> int:
         The ID of the only claim that does not overlap.
     """
     claims = _read_claims(input_string)
-    claims_per_square = _count_claims_per_square(claims)
-    for claim in claims:
-        if not _claim_overlaps(claim, claims_per_square):
-            return claim.id
-    return None
+    claims_per_square = _try_count_claims_per_square(claims)
+    if claims_per_square is None:
+        return _get_intact_claim_id_sweep(claims)
+    return _get_intact_claim_id(claims, claims_per_square)
+
+
+@cache.cached()
+@memory.measured
+def solve(input_string: str) -> Tuple[int, int]:
+    """Solves both parts of the day's puzzle, reading the input once.
+
+    Both parts share the number of claims for each square inch of fabric, or
+    are answered without it if it exceeds the memory budget.
+
+    Args:
+        input_string: The puzzle input.
+
+    Returns:
+        The number of square inches that have overlapping claims and the ID of
+        the only claim that does not overlap.
+    """
+    claims = _read_claims(input_string)
+    claims_per_square = _try_count_claims_per_square(claims)
+    if claims_per_square is None:
+        return (_count_overclaimed_squares_sweep(claims),
+                _get_intact_claim_id_sweep(claims))
+    return (_count_overclaimed_squares(claims_per_square),
+            _get_intact_claim_id(claims, claims_per_square))
+
+
+def solve_batch(inputs: Iterable[batch.Input],
+                pool: Optional[str] = 'process',
+                workers: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """Solves both parts of the day's puzzle for many inputs.
+
+    See batch.solve_batch for details.
+
+    Args:
+        inputs: The puzzle inputs, or paths to them.
+        pool: The kind of pool the inputs are solved in.
+        workers: The number of workers in the pool.
+
+    Yields:
+        The answers to both parts of the puzzle for each input, in order.
+    """
+    return batch.solve_batch(solve, inputs, pool, workers)
 
 
 def _run_tests() -> None:
@@ -146,6 +406,23 @@ def _run_tests() -> None:
         '#1 @ 1,3: 4x4\n#2 @ 3,1: 4x4\n#3 @ 5,5: 2x2') == 4
     assert get_intact_claim_id(
         '#1 @ 1,3: 4x4\n#2 @ 3,1: 4x4\n#3 @ 5,5: 2x2') == 3
+    assert list(
+        solve_batch(['#1 @ 1,3: 4x4\n#2 @ 3,1: 4x4\n#3 @ 5,5: 2x2'] * 2,
+                    pool='process',
+                    workers=2)) == [(4, 3), (4, 3)]
+    with cache.bypass(), memory.record() as reports:
+        solve('#1 @ 1,3: 4x4\n#2 @ 3,1: 4x4\n#3 @ 5,5: 2x2')
+    assert [report.phase for report in reports
+           ] == ['parse', 'build', 'compute', 'compute', 'total']
+    # The matrix of a whole fabric takes a few megabytes.
+    assert reports[1].retained > _FABRIC_SIZE * _FABRIC_SIZE
+    # Without a matrix when it does not fit in 1 MB.
+    with cache.bypass(), memory.limit(1 << 20), memory.record() as reports:
+        assert solve('#1 @ 1,3: 4x4\n#2 @ 3,1: 4x4\n#3 @ 5,5: 2x2') == (4, 3)
+        assert solve('#1 @ 0,0: 3x3\n#2 @ 1,1: 3x3\n#3 @ 2,0: 1x5\n'
+                     '#4 @ 5,5: 1x1') == (6, 4)
+    assert all(report.peak < 1 << 20 for report in reports
+               if report.phase != 'build')
 
 
 def _print_answers(overclaimed_squares: int = None,
@@ -162,11 +439,8 @@ def _print_answers(overclaimed_squares: int = None,
 
 
 def main() -> None:
-    """Runs tests and prints answers to day's puzzle."""
-    _run_tests()
-    input_string = utils.read_input(3)
-    overclaimed_squares = count_overclaimed_squares(input_string)
-    intact_claim_id = get_intact_claim_id(input_string)
+    """Prints answers to day's puzzle."""
+    overclaimed_squares, intact_claim_id = solve(utils.read_input(3))
     _print_answers(overclaimed_squares, intact_claim_id)
 
 
@@ -49,9 +49,9 @@ Part 2:
 
 import datetime
 import re
-from typing import Dict, List, NamedTuple, Tuple
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
-import utils
+from . import batch, cache, memory, utils
 
 
 class Record(NamedTuple):  # pylint: disable=R0903
@@ -65,6 +65,7 @@ class Record(NamedTuple):  # pylint: disable=R0903
     content: str
 
 
+@memory.phase('parse')
 def _read_records(input_string: str) -> List[Record]:
     """Reads records of guard activity from a given input string and sorts them.
 
@@ -84,6 +85,7 @@ def _read_records(input_string: str) -> List[Record]:
     return sorted(records)
 
 
+@memory.phase('build')
 def _map_records_to_guards(records: List[Record]) -> Dict[int, List[Record]]:
     """Maps each record to the guard the record is about.
 
@@ -175,23 +177,55 @@ def _get_sneakiest_minute(
     return (favorite_minute, sleepy_guard_id)
 
 
-def get_strategy_1(input_string: str) -> int:
+@memory.phase('compute')
+def _get_strategy_1(guard_records: Dict[int, List[Record]]) -> int:
     """Find the guard with the most minutes asleep and their most slept minute.
 
     Args:
-        input_string: The puzzle input.
+        guard_records: A dictionary that maps each guard's ID to their records.
 
     Returns:
         The product of the guard's ID and the minute they slept through the
         most.
     """
-    records = _read_records(input_string)
-    guard_records = _map_records_to_guards(records)
     sleepy_guard_id = _get_guard_with_most_sleep(guard_records)
     favorite_minute, _ = _get_favorite_minute(guard_records[sleepy_guard_id])
     return sleepy_guard_id * favorite_minute
 
 
+@memory.phase('compute')
+def _get_strategy_2(guard_records: Dict[int, List[Record]]) -> int:
+    """Find the guard most frequently asleep on the same minute.
+
+    Args:
+        guard_records: A dictionary that maps each guard's ID to their records.
+
+    Returns:
+        The product of the guard's ID and the minute they slept through the
+        most.
+    """
+    favorite_minute, sleepy_guard_id = _get_sneakiest_minute(guard_records)
+    return sleepy_guard_id * favorite_minute
+
+
+@cache.cached()
+@memory.measured
+def get_strategy_1(input_string: str) -> int:
+    """Find the guard with the most minutes asleep and their most slept minute.
+
+    Args:
+        input_string: The puzzle input.
+
+    Returns:
+        The product of the guard's ID and the minute they slept through the
+        most.
+    """
+    records = _read_records(input_string)
+    return _get_strategy_1(_map_records_to_guards(records))
+
+
+@cache.cached()
+@memory.measured
 def get_strategy_2(input_string: str) -> int:
     """Find the guard most frequently asleep on the same minute.
 
@@ -203,9 +237,40 @@ def get_strategy_2(input_string: str) -> int:
         most.
     """
     records = _read_records(input_string)
-    guard_records = _map_records_to_guards(records)
-    favorite_minute, sleepy_guard_id = _get_sneakiest_minute(guard_records)
-    return sleepy_guard_id * favorite_minute
+    return _get_strategy_2(_map_records_to_guards(records))
+
+
+@cache.cached()
+@memory.measured
+def solve(input_string: str) -> Tuple[int, int]:
+    """Solves both parts of the day's puzzle, reading the input once.
+
+    Args:
+        input_string: The puzzle input.
+
+    Returns:
+        The results of the first and second strategies.
+    """
+    guard_records = _map_records_to_guards(_read_records(input_string))
+    return _get_strategy_1(guard_records), _get_strategy_2(guard_records)
+
+
+def solve_batch(inputs: Iterable[batch.Input],
+                pool: Optional[str] = 'process',
+                workers: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """Solves both parts of the day's puzzle for many inputs.
+
+    See batch.solve_batch for details.
+
+    Args:
+        inputs: The puzzle inputs, or paths to them.
+        pool: The kind of pool the inputs are solved in.
+        workers: The number of workers in the pool.
+
+    Yields:
+        The answers to both parts of the puzzle for each input, in order.
+    """
+    return batch.solve_batch(solve, inputs, pool, workers)
 
 
 def _run_tests() -> None:
@@ -244,6 +309,11 @@ def _run_tests() -> None:
                           '[1518-11-05 00:03] Guard #99 begins shift\n'
                           '[1518-11-05 00:45] falls asleep\n'
                           '[1518-11-05 00:55] wakes up') == 4455
+    assert list(
+        solve_batch(['[1518-11-01 00:00] Guard #10 begins shift\n'
+                     '[1518-11-01 00:05] falls asleep\n'
+                     '[1518-11-01 00:25] wakes up'],
+                    pool='thread')) == [(50, 50)]
 
 
 def _print_answers(strategy_1: int = None, strategy_2: int = None) -> None:
@@ -258,11 +328,8 @@ def _print_answers(strategy_1: int = None, strategy_2: int = None) -> None:
 
 
 def main() -> None:
-    """Runs tests and prints answers to day's puzzle."""
-    _run_tests()
-    input_string = utils.read_input(4)
-    strategy_1 = get_strategy_1(input_string)
-    strategy_2 = get_strategy_2(input_string)
+    """Prints answers to day's puzzle."""
+    strategy_1, strategy_2 = solve(utils.read_input(4))
     _print_answers(strategy_1, strategy_2)
 
 
@@ -5,9 +5,10 @@ Reading input:
     _read_polymer function.
 
 Matching units:
-    Checking whether two units match is only a question of checking if both are
-    the same letter and one is uppercase and the other lowercase. See
-    _units_match function.
+    Two units match if they are the same letter with opposite polarity. In
+    ASCII, the lowercase and uppercase versions of a letter only differ by the
+    0x20 bit, so two units match exactly when their byte values XOR to 0x20. See
+    _reduce_units function.
 
 Reducing a polymer:
     Reducing a polymer is the core of the problem. Strings are immutable in
@@ -15,13 +16,19 @@ Reducing a polymer:
     yield terrible performance. Similarly, removing elements from the middle of
     a list yiels terrible performance as well, so converting our polymer string
     into a list would not solve the problem. On the other hand, appending values
-    to the end of a list and popping values from the end of a list can be done
-    in constant time. We can read through our polymer string and append each
-    unit to a list one by one. If the unit we are reading matches the last unit
-    in the list (effectively its neighbor in the polymer) then instead of
-    appending the new unit, we pop the last unit from the list and discard both.
-    A single pass with this algorithm provides a list of units that, when
-    joined, make up the reduced polymer. See _reduce_polymer function.
+    to the end of a bytearray and popping values from the end of a bytearray can
+    be done in constant time. We can read through our polymer and append each
+    unit to a stack one by one. If the unit we are reading matches the last unit
+    on the stack (effectively its neighbor in the polymer) then instead of
+    pushing the new unit, we pop the last unit from the stack and discard both.
+    A single pass with this algorithm provides a stack of units that make up
+    the reduced polymer. See _reduce_units and _reduce_polymer functions.
+
+Streaming polymers:
+    Since the stack only ever depends on the units read so far, the polymer
+    does not need to be in memory all at once: it can be fed to the stack chunk
+    by chunk, and the size of the reduced polymer is known at any time. See
+    PolymerReducer class.
 
 Part 1:
     Once we have the reduced polymer, all we need to do is measure its length.
@@ -29,83 +36,162 @@ Part 1:
 
 Improving a polymer:
     To improve a polymer, all we need to do is remove all units of a given type.
-    Using regular expressions, we can replace all instances of the unit type
-    characters (both lowercase and uppercase) by nothing, effectively removing
-    them in one pass. See _improve_polymer function.
+    Python's bytes.translate function can delete both the lowercase and
+    uppercase characters of the unit type in one pass. See _improve_polymer
+    function.
 
 Part 2:
     Finding the best improved polymer is only a question of building all 26
-    improved polymers and seeing which one is the smallest once reduced. See
-    get_improved_size function.
+    improved polymers and seeing which one is the smallest once reduced. The
+    PolymerReducer can keep one stack per improved polymer next to the main
+    one, so both answers are available after reading the polymer once. See
+    get_improved_size and get_sizes functions.
 """
 
-import re
 import string
+from typing import Iterable, Iterator, Optional, Tuple, Union
 
-import utils
+from . import batch, cache, memory, utils
 
+_WHITESPACE = string.whitespace.encode('ascii')
+_UNIT_TYPES = string.ascii_lowercase.encode('ascii')
 
-def _read_polymer(input_string: str) -> str:
+
+@memory.phase('parse')
+def _read_polymer(input_string: str) -> bytes:
     """Reads the polymer from a given input string.
 
     Args:
         input_string: A string containing the day's input.
 
     Returns:
-        A string representing the polymer.
+        The polymer's units as ASCII bytes.
     """
-    return input_string
+    return input_string.encode('ascii')
 
 
-def _units_match(unit_1: str, unit_2: str) -> bool:
-    """Checks whether both units are of the same type and opposite polarity.
+def _reduce_units(stack: bytearray, units: bytes) -> None:
+    """Triggers the given units against those already on a stack.
 
     Args:
-        unit_1: A single-character string representing the first unit.
-        unit_2: A single-character string representing the second unit.
+        stack: The units of an already reduced polymer.
+        units: The units to add at the end of the polymer.
 
     Returns:
-        Whether the two units are of the same type (same letter) and opposite
-        polarity (one uppercase, one lowercase).
+        Nothing. The stack is modified in-place.
     """
-    if unit_1.islower():
-        return unit_1.upper() == unit_2
-    return unit_1.lower() == unit_2
+    for unit in units:
+        if stack and stack[-1] == unit ^ 0x20:
+            stack.pop()
+        else:
+            stack.append(unit)
 
 
-def _reduce_polymer(polymer: str) -> str:
+@memory.phase('compute')
+def _reduce_polymer(polymer: bytes) -> bytes:
     """Triggers the units in a given polymer and provides the reduced version.
 
     Args:
-        polymer: A string representing the polymer.
+        polymer: The polymer's units as ASCII bytes.
 
     Returns:
-        A string representing the reduced polymer.
+        The reduced polymer's units as ASCII bytes.
     """
-    reduced_units = []
-    for unit in polymer:
-        if not reduced_units:
-            reduced_units.append(unit)
-        elif _units_match(unit, reduced_units[-1]):
-            reduced_units.pop()
-        else:
-            reduced_units.append(unit)
-    return ''.join(reduced_units)
+    stack = bytearray()
+    _reduce_units(stack, polymer)
+    return bytes(stack)
 
 
-def _improve_polymer(polymer: str, unit_type: str) -> str:
+def _improve_polymer(polymer: bytes, unit_type: int) -> bytes:
     """Removes a given unit type from a given polymer.
 
     Args:
-        polymer: A string representing a polymer.
-        unit_type: A single-character string representing the unit type.
+        polymer: The polymer's units as ASCII bytes.
+        unit_type: The ASCII code of the unit type, in either polarity.
 
     Returns:
-        A string representing the reduced polymer.
+        The improved polymer's units as ASCII bytes.
     """
-    return re.sub(f'{unit_type.lower()}|{unit_type.upper()}', '', polymer)
+    return polymer.translate(None, bytes((unit_type | 0x20, unit_type & ~0x20)))
 
 
+class PolymerReducer:
+    """Reduces a polymer that is provided in chunks.
+
+    Only the reduced polymer is kept in memory, as a stack of units. The
+    reducer can also keep one stack per unit type for the improved polymers
+    where that unit type has been removed.
+    """
+
+    def __init__(self, track_improved: bool = False) -> None:
+        """Initialises the reducer.
+
+        Args:
+            track_improved: Whether to also reduce the 26 improved polymers.
+        """
+        self._stack = bytearray()
+        self._improved_stacks = {}
+        if track_improved:
+            self._improved_stacks = {
+                unit_type: bytearray() for unit_type in _UNIT_TYPES
+            }
+
+    def feed(self, chunk: Union[str, bytes]) -> None:
+        """Appends units to the polymer and reduces them.
+
+        Whitespace in the chunk is ignored, so a file can be fed as is.
+
+        Args:
+            chunk: The units to append, as a string or as ASCII bytes.
+        """
+        if isinstance(chunk, str):
+            chunk = chunk.encode('ascii')
+        chunk = chunk.translate(None, _WHITESPACE)
+        _reduce_units(self._stack, chunk)
+        for unit_type, stack in self._improved_stacks.items():
+            _reduce_units(stack, _improve_polymer(chunk, unit_type))
+
+    @property
+    def reduced_size(self) -> int:
+        """The size of the polymer fed so far, once reduced."""
+        return len(self._stack)
+
+    @property
+    def improved_size(self) -> int:
+        """The size of the smallest reduced improved polymer fed so far."""
+        if not self._improved_stacks:
+            raise ValueError('improved polymers are not tracked')
+        return min(len(stack) for stack in self._improved_stacks.values())
+
+    def reduced_polymer(self) -> str:
+        """Provides the polymer fed so far, once reduced.
+
+        Returns:
+            A string representing the reduced polymer.
+        """
+        return self._stack.decode('ascii')
+
+
+@memory.phase('compute')
+def _get_improved_size(reduced_polymer: bytes) -> int:
+    """Finds the size of the smallest polymer possible from a reduced polymer.
+
+    Args:
+        reduced_polymer: The reduced polymer's units as ASCII bytes.
+
+    Returns:
+        An integer representing the size of the smallest reduced polymer.
+    """
+    # Reduction and improvement commute, so the reduced polymer can be improved
+    # instead of the (longer) original one.
+    return min([
+        len(_reduce_polymer(_improve_polymer(reduced_polymer, unit_type)))
+        for unit_type in _UNIT_TYPES
+    ])
+
+
+@cache.cached()
+@memory.measured
 def get_reduced_size(input_string: str) -> int:
     """Finds the size of the polymer once it ahs been reduced.
 
@@ -120,6 +206,8 @@ def get_reduced_size(input_string: str) -> int:
     return len(reduced_polymer)
 
 
+@cache.cached()
+@memory.measured
 def get_improved_size(input_string: str) -> int:
     """Finds the smallest polymer possible and provides its length.
 
@@ -129,11 +217,59 @@ def get_improved_size(input_string: str) -> int:
     Returns:
         An integer representing the size of the smallest reduced polymer.
     """
-    polymer = _read_polymer(input_string)
-    return min([
-        len(_reduce_polymer(_improve_polymer(polymer, unit_type)))
-        for unit_type in string.ascii_lowercase
-    ])
+    polymer = _reduce_polymer(_read_polymer(input_string))
+    return _get_improved_size(polymer)
+
+
+@memory.measured
+def get_sizes(chunks: Iterable[Union[str, bytes]]) -> Tuple[int, int]:
+    """Finds the reduced and improved sizes of a polymer in a single pass.
+
+    Args:
+        chunks: The puzzle input, split in consecutive chunks.
+
+    Returns:
+        A pair of integers representing the size of the reduced polymer and the
+        size of the smallest reduced polymer.
+    """
+    reducer = PolymerReducer(track_improved=True)
+    for chunk in chunks:
+        reducer.feed(chunk)
+    return reducer.reduced_size, reducer.improved_size
+
+
+@cache.cached()
+@memory.measured
+def solve(input_string: str) -> Tuple[int, int]:
+    """Solves both parts of the day's puzzle, reducing the polymer once.
+
+    Args:
+        input_string: The puzzle input.
+
+    Returns:
+        A pair of integers representing the size of the reduced polymer and the
+        size of the smallest reduced polymer.
+    """
+    reduced_polymer = _reduce_polymer(_read_polymer(input_string))
+    return len(reduced_polymer), _get_improved_size(reduced_polymer)
+
+
+def solve_batch(inputs: Iterable[batch.Input],
+                pool: Optional[str] = 'process',
+                workers: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """Solves both parts of the day's puzzle for many inputs.
+
+    See batch.solve_batch for details.
+
+    Args:
+        inputs: The puzzle inputs, or paths to them.
+        pool: The kind of pool the inputs are solved in.
+        workers: The number of workers in the pool.
+
+    Yields:
+        The answers to both parts of the puzzle for each input, in order.
+    """
+    return batch.solve_batch(solve, inputs, pool, workers)
 
 
 def _run_tests() -> None:
@@ -144,6 +280,10 @@ def _run_tests() -> None:
     assert get_reduced_size('aabAAB') == 6
     assert get_reduced_size('dabAcCaCBAcCcaDA') == 10
     assert get_improved_size('dabAcCaCBAcCcaDA') == 4
+    assert get_sizes(['dabAc', 'CaCB', '', 'AcCcaDA\n']) == (10, 4)
+    assert get_sizes(['aA', 'bB']) == (0, 0)
+    assert list(solve_batch(['dabAcCaCBAcCcaDA', 'aabAAB'],
+                            pool='thread')) == [(10, 4), (6, 0)]
 
 
 def _print_answers(reduced_size: int = None, improved_size: int = None) -> None:
@@ -159,11 +299,8 @@ def _print_answers(reduced_size: int = None, improved_size: int = None) -> None:
 
 
 def main() -> None:
-    """Runs tests and prints answers to day's puzzle."""
-    _run_tests()
-    input_string = utils.read_input(5)
-    reduced_size = get_reduced_size(input_string)
-    improved_size = get_improved_size(input_string)
+    """Prints answers to day's puzzle."""
+    reduced_size, improved_size = get_sizes(utils.stream_input(5))
     _print_answers(reduced_size, improved_size)
 
 
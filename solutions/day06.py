@@ -13,8 +13,10 @@ Normalizing coordinates:
     _normalize_coordinates function.
 
 Building a matrix:
-    We can build our matrix in memory as a list of lists. See _build_matrix
-    function.
+    Each cell of our matrix will contain a label: the index of a coordinate, or
+    -1 when no coordinate applies. Labels are small integers, so the matrix can
+    be stored as a single flat array of C integers in row-major order, which
+    only takes 4 bytes per cell. See _build_matrix function.
 
 Manhattan distance:
     The Manhattan distance is a very simple computation that relies on Python's
@@ -24,22 +26,51 @@ Areas of influence:
     We need to map each cell of our matrix to the closest coordinate. We can
     find the distance from the cell to each coordinate and assign the cell to
     the closest coordinate. In case of tie, no coordinate is assigned. See
-    _fill_matrix function.
+    _fill_matrix_python function. With the NumPy backend, the matrix is filled
+    from a label grid instead (see below and _fill_matrix_numpy function).
 
 Area sizes:
     Measuring the size of all areas is only a question of counting how many
-    cells were assigned to each coordinate in the previous step. See
-    _get_area_sizes function.
+    cells were assigned to each coordinate in the previous step. Since labels
+    are indices, NumPy's bincount function can count them all at once. See
+    _get_area_sizes_python and _get_area_sizes_numpy functions.
 
 Infinite areas:
     Areas that are adjacent to the side of our matrix are infinite. We can use
-    this to identifiy infinite areas. See _get_infinite_area_points function.
+    this to identifiy infinite areas. In a flat matrix, the four sides are
+    slices of the array: the first and last rows are contiguous, and the first
+    and last columns are slices with a step of the matrix's width. See
+    _get_border_labels function.
 
 Part 1:
     We can build and fill a matrix based on the normalised coordinates, get the
     size of each area, discard areas that are infinite, and find the largest
     finite area. See get_largest_finite_area function.
 
+Vectorized areas of influence:
+    Filling the matrix cell by cell in Python gets slow as soon as there are
+    more than a few hundred coordinates. With NumPy, the distances from every
+    cell in a chunk of rows to one coordinate can be computed at once by
+    broadcasting the horizontal and vertical distances. Going through the
+    coordinates one by one, we keep the running minimum distance of each cell,
+    the index of the closest coordinate so far, and a mask of the cells where
+    the minimum is tied. The result is a grid of int32 labels, where each cell
+    contains the index of its closest coordinate or -1 in case of tie. See
+    _fill_label_grid function.
+
+Flood filling areas of influence:
+    With Manhattan distances, the distance from a coordinate to a cell is also
+    the number of steps it takes to walk from one to the other. Expanding from
+    all coordinates at once, one step at a time, like a breadth-first search,
+    reaches every cell at the same step from its closest coordinates. A cell is
+    reached at that step by all its closest coordinates, through neighbors that
+    were reached at the previous step, so a cell reached by different labels
+    (or by a tied neighbor) during a step is itself a tie. Every cell is visited
+    once no matter how many coordinates there are. The frontiers are stored as
+    arrays of cell indices, and the grid is padded with a border of sentinel
+    cells so neighbors never need bounds checks. Areas that reach the cells next
+    to the padding are infinite. See _flood_fill function.
+
 Sum of distances:
     Since we already know how to compute the distance between a cell of the
     matrix and any coordinate, we can easily compute the sum of all distances
@@ -49,16 +80,101 @@ Part 2:
     We can build a matrix based on the normalised coordinates and count how
     many cells have a total distance from all coordinates that is below a
     certain threshold. See get_safe_area function.
+
+Separable sum of distances:
+    The Manhattan distance is the sum of a horizontal and a vertical distance,
+    so the total distance of a cell is the sum of the total horizontal distance
+    of its column and the total vertical distance of its row. With sorted
+    coordinates, the total distance along an axis changes by the number of
+    coordinates before the current position minus the number of coordinates
+    after it when moving one step forward, so all columns (and all rows) can be
+    computed in a single sweep. See _get_axis_distances function.
+
+Safe area without a matrix:
+    Once the total distances of all columns and all rows are sorted, counting
+    the cells whose column and row distances add up to less than the threshold
+    can be done with two pointers, one going up the columns and the other going
+    down the rows. Beyond the coordinates' bounding box, each step away adds
+    the number of coordinates to the total distance, which tells us how far the
+    safe area can extend outside of the bounding box. See
+    _safe_area_separable function.
+
+Tiled grids:
+    Instead of holding a whole matrix in memory, the grid can be split into
+    tiles that are processed independently, each in its own process. A tile
+    reports how many of its cells belong to each area, which areas touch the
+    side of the grid within the tile, and how many of its cells are safe. The
+    reports of all tiles are then merged to get both answers. Only one tile per
+    worker process is held in memory at any time. See _solve_tiled function.
+
+Infinite areas without a matrix:
+    If a cell on the side of the bounding box belongs to an area, so do all
+    the cells beyond it: stepping away from the bounding box adds one to the
+    distance to every coordinate. Conversely, an infinite area has to cross the
+    side of the bounding box to get out of it. Checking the cells on the side
+    of the bounding box is therefore enough to find all infinite areas. See
+    _get_unbounded_labels function.
+
+Measuring areas without a matrix:
+    If a cell belongs to an area, so does every cell in the rectangle between
+    that cell and the area's coordinate: walking towards the coordinate brings
+    the cell one step closer to it, and at most one step closer to any other
+    coordinate. Each row of an area is therefore a single run of cells that
+    includes the coordinate's column, and the rows of an area are consecutive.
+    A finite area can be measured by walking up and down from its coordinate,
+    and left and right along each row, until reaching cells that belong to
+    another area. Only the cells of finite areas and of the side of the
+    bounding box are ever looked at. See _measure_area function.
+
+Pruning neighbors:
+    A coordinate at least as close to a cell as the area's coordinate, at
+    distance d from it, is at most 2d away from the area's coordinate. With the
+    other coordinates sorted by distance to the area's coordinate, checking a
+    cell only looks at the few neighbors within that distance, and cells near
+    the coordinate look at none. The same bound, from the closest coordinate of
+    the previous cell, finds the closest coordinate of each cell while walking
+    around the side of the bounding box. See _get_neighbors, _is_closest and
+    _get_closest functions.
+
+Memory budget:
+    Engines that fill a grid hold width x height labels in memory, which can
+    exceed the memory budget set for the memory module on large inputs. When
+    no engine is chosen, get_largest_finite_area then falls back to measuring
+    areas without a matrix, which only needs memory for the side of the
+    bounding box and the neighbors of one coordinate, all in the current
+    process. The tiled engine is not used, as the memory of its worker
+    processes is not counted against the budget. See _largest_finite_area
+    function.
 """
 
+import bisect
+import collections
+import functools
+import itertools
 import re
-from typing import Dict, List, Set, Tuple
+from array import array
+from typing import (Callable, Dict, Iterable, Iterator, List, NamedTuple,
+                    Optional, Set, Tuple)
 
-import utils
+from . import backends, batch, cache, memory, utils
 
 Point = Tuple[int, int]
 
+# The number of cells processed at once by _fill_label_grid.
+_CHUNK_CELLS = 1 << 16
+
+# The width and height of the tiles processed by _solve_tiled.
+_TILE_SIZE = 256
 
+# The label of cells with several closest coordinates.
+_TIE = -1
+
+# Special cell labels only used while flood filling.
+_UNSEEN = -2
+_PADDING = -3
+
+
+@memory.phase('parse')
 def _read_coordinates(input_string: str) -> List[Point]:
     """Reads coordinates from a given input string.
 
@@ -91,19 +207,21 @@ def _normalize_coordinates(coordinates: List[Point]) -> List[Point]:
     return [(c[0] - min_x, c[1] - min_y) for c in coordinates]
 
 
-def _build_matrix(width: int, height: int,
-                  content: Point = None) -> List[List[str]]:
-    """Builds a matrix of strings with given width and height.
+@memory.phase('build')
+def _build_matrix(width: int, height: int, content: int = _TIE) -> array:
+    """Builds a flat matrix of labels with given width and height.
 
     Args:
         width: Desired width of the matrix.
         height: Desired height of the matrix.
-        content: The value to fill the cells of the matrix with.
+        content: The label to fill the cells of the matrix with.
 
     Returns:
-        A width x height matrix where each cell contains content.
+        A flat array of width x height labels in row-major order, where each
+        cell contains content.
     """
-    return [[content for x in range(width)] for y in range(height)]
+    memory.reserve(4 * width * height)
+    return array('i', [content]) * (width * height)
 
 
 def _manhattan_distance(point_1: Point, point_2: Point) -> int:
@@ -119,71 +237,250 @@ def _manhattan_distance(point_1: Point, point_2: Point) -> int:
     return abs(point_1[0] - point_2[0]) + abs(point_1[1] - point_2[1])
 
 
-def _fill_matrix(matrix: List[List[Point]], coordinates: List[Point]) -> None:
+def _fill_matrix_python(matrix: array,
+                        width: int,
+                        coordinates: List[Point],
+                        left: int = 0,
+                        top: int = 0) -> None:
     """Fills a given matrix with the given coordinates' areas of influence.
 
     Args:
-        matrix: The matrix to fill.
+        matrix: The flat matrix to fill.
+        width: Width of the matrix.
         coordinates: A list of points to fill the matrix with.
+        left: The column of the matrix's left side.
+        top: The row of the matrix's top side.
 
     Returns:
-        Nothing. The matrix is modified in-place.
+        Nothing. The matrix is modified in-place: each cell contains the index
+        of the closest coordinate, or -1 if several coordinates are the
+        closest.
     """
-    for row, _ in enumerate(matrix):
-        for col, _ in enumerate(matrix[row]):
-            distances = {
-                coordinate: _manhattan_distance(coordinate, (col, row))
-                for coordinate in coordinates
-            }
-            min_distance = min(distances.values())
-            closest_points = [
-                point for point, distance in distances.items()
-                if distance == min_distance
-            ]
-            if len(closest_points) == 1:
-                matrix[row][col] = closest_points[0]
-            else:
-                matrix[row][col] = None
+    for cell, _ in enumerate(matrix):
+        row, col = divmod(cell, width)
+        distances = [
+            _manhattan_distance(coordinate, (left + col, top + row))
+            for coordinate in coordinates
+        ]
+        min_distance = min(distances)
+        if distances.count(min_distance) == 1:
+            matrix[cell] = distances.index(min_distance)
+        else:
+            matrix[cell] = _TIE
 
 
-def _get_area_sizes(matrix: List[List[Point]]) -> Dict[Point, int]:
+def _fill_matrix_numpy(matrix: array,
+                       width: int,
+                       coordinates: List[Point],
+                       left: int = 0,
+                       top: int = 0) -> None:
+    """Fills a given matrix with the given coordinates' areas of influence.
+
+    See _fill_matrix_python for details.
+    """
+    labels = _fill_label_grid(coordinates, width,
+                              len(matrix) // width, left, top)
+    matrix[:] = array('i', labels.tobytes())
+
+
+_FILL_MATRIX_BACKENDS = {
+    backends.PYTHON: _fill_matrix_python,
+    backends.NUMPY: _fill_matrix_numpy,
+}
+
+
+@memory.phase('build')
+def _fill_matrix(matrix: array,
+                 width: int,
+                 coordinates: List[Point],
+                 left: int = 0,
+                 top: int = 0) -> None:
+    """Fills a given matrix with the current backend.
+
+    See _fill_matrix_python for details.
+    """
+    backends.select(_FILL_MATRIX_BACKENDS)(matrix, width, coordinates, left,
+                                           top)
+
+
+def _get_area_sizes_python(matrix: array, count: int) -> List[int]:
     """Counts the number of cells belonging to each area.
 
     Args:
-        matrix: A 2D matrix of points where areas are defined by different cells
-            containing the same value.
+        matrix: A flat matrix of labels, either an array or a NumPy array.
+        count: The number of coordinates.
 
     Returns:
-        A dictionary with as keys the different cell values in the matrix and as
-            values the number of cells containing the corresponding value.
+        A list where the n-th value is the number of cells with label n.
+    """
+    label_to_count = collections.Counter(matrix)
+    return [label_to_count[label] for label in range(count)]
+
+
+def _get_area_sizes_numpy(matrix: array, count: int) -> List[int]:
+    """Counts the number of cells belonging to each area.
+
+    See _get_area_sizes_python for details.
     """
-    value_to_count = {}
-    for row in matrix:
-        for value in row:
-            if value not in value_to_count.keys():
-                value_to_count[value] = 0
-            value_to_count[value] += 1
-    return value_to_count
+    np = utils.get_numpy()
+    labels = np.frombuffer(matrix, dtype=np.int32)
+    # Ties are shifted to the first bin, and then dropped.
+    return np.bincount(labels + 1, minlength=count + 1)[1:].tolist()
 
 
-def _get_infinite_area_points(matrix: List[List[Point]]) -> Set[Point]:
-    """Finds which points have infinite areas.
+_GET_AREA_SIZES_BACKENDS = {
+    backends.PYTHON: _get_area_sizes_python,
+    backends.NUMPY: _get_area_sizes_numpy,
+}
+
+
+def _get_area_sizes(matrix: array, count: int) -> List[int]:
+    """Counts the number of cells belonging to each area with current backend.
+
+    See _get_area_sizes_python for details.
+    """
+    return backends.select(_GET_AREA_SIZES_BACKENDS)(matrix, count)
+
+
+def _get_border_labels(matrix: array, width: int) -> Set[int]:
+    """Finds which labels have infinite areas.
+
+    Args:
+        matrix: A flat matrix of labels, either an array or a NumPy array.
+        width: Width of the matrix.
+
+    Returns:
+        A set of labels whose areas touch the side of the matrix.
+    """
+    border_labels = set()
+    for side in (matrix[:width], matrix[-width:], matrix[::width],
+                 matrix[width - 1::width]):
+        border_labels.update(side.tolist())
+    return border_labels - {_TIE}
+
+
+@memory.phase('compute')
+def _get_largest_finite_area_size(matrix: array, width: int,
+                                  count: int) -> int:
+    """Finds the size of the largest area that does not touch the side.
+
+    Args:
+        matrix: A flat matrix of labels, either an array or a NumPy array.
+        width: Width of the matrix.
+        count: The number of coordinates.
+
+    Returns:
+        An integer representing the size of the largest finite area.
+    """
+    area_sizes = _get_area_sizes(matrix, count)
+    border_labels = _get_border_labels(matrix, width)
+    finite_areas = [
+        area for label, area in enumerate(area_sizes)
+        if label not in border_labels
+    ]
+    return max(finite_areas, default=0)
+
+
+@memory.phase('build')
+def _fill_label_grid(coordinates: List[Point],
+                     width: int,
+                     height: int,
+                     left: int = 0,
+                     top: int = 0) -> 'np.ndarray':
+    """Builds a grid of the given coordinates' areas of influence.
 
     Args:
-        matrix: A 2D matrix of points where areas are defined by different cells
-            containing the same instance of Point.
+        coordinates: A list of points to fill the grid with.
+        width: Width of the grid.
+        height: Height of the grid.
+        left: The column of the grid's left side.
+        top: The row of the grid's top side.
 
     Returns:
-        A set of points whose areas touch the side of the matrix.
+        A height x width int32 array where each cell contains the index of the
+        closest coordinate, or -1 if several coordinates are the closest.
     """
-    infinite_area_points = set()
-    for row, _ in enumerate(matrix):
-        infinite_area_points.add(matrix[row][0])
-        infinite_area_points.add(matrix[row][-1])
-    for col, _ in enumerate(matrix[0]):
-        infinite_area_points.add(matrix[0][col])
-        infinite_area_points.add(matrix[-1][col])
-    return infinite_area_points - {None}
+    np = utils.get_numpy()
+    # Labels, distances along each axis, and the arrays of a chunk of rows.
+    memory.reserve(4 * (width * height + len(coordinates) *
+                        (width + height)) + 16 * _CHUNK_CELLS)
+    labels = np.empty((height, width), dtype=np.int32)
+    x_distances = np.abs(
+        np.arange(left, left + width, dtype=np.int32)[np.newaxis, :] -
+        np.array([c[0] for c in coordinates], dtype=np.int32)[:, np.newaxis])
+    y_distances = np.abs(
+        np.arange(top, top + height, dtype=np.int32)[np.newaxis, :] -
+        np.array([c[1] for c in coordinates], dtype=np.int32)[:, np.newaxis])
+    chunk_rows = max(1, _CHUNK_CELLS // width)
+    for chunk_top in range(0, height, chunk_rows):
+        chunk_bottom = min(chunk_top + chunk_rows, height)
+        min_distance = np.full((chunk_bottom - chunk_top, width),
+                               np.iinfo(np.int32).max,
+                               dtype=np.int32)
+        closest = labels[chunk_top:chunk_bottom]
+        tied = np.zeros((chunk_bottom - chunk_top, width), dtype=bool)
+        for index, _ in enumerate(coordinates):
+            distance = (y_distances[index, chunk_top:chunk_bottom, np.newaxis] +
+                        x_distances[index, np.newaxis, :])
+            closer = distance < min_distance
+            tied &= ~closer
+            tied |= distance == min_distance
+            np.minimum(min_distance, distance, out=min_distance)
+            closest[closer] = index
+        closest[tied] = -1
+    return labels
+
+
+@memory.phase('build')
+def _flood_fill(coordinates: List[Point], width: int, height: int) -> array:
+    """Fills a grid with the given coordinates' areas of influence.
+
+    Args:
+        coordinates: A list of points to fill the grid with.
+        width: Width of the grid.
+        height: Height of the grid.
+
+    Returns:
+        A flat array of width x height labels in row-major order, where each
+        cell contains the index of the closest coordinate, or -1 if several
+        coordinates are the closest.
+    """
+    stride = width + 2
+    # Labels, reached marks, and the matrix copied out of the labels.
+    memory.reserve(9 * stride * (height + 2))
+    labels = array('i', [_PADDING]) * (stride * (height + 2))
+    for row in range(1, height + 1):
+        labels[row * stride + 1:row * stride + width + 1] = array(
+            'i', [_UNSEEN]) * width
+    # Marks the cells reached during the current step.
+    reached = bytearray(len(labels))
+    frontier = array('i')
+    for index, (col, row) in enumerate(coordinates):
+        cell = (row + 1) * stride + col + 1
+        if labels[cell] == _UNSEEN:
+            labels[cell] = index
+            frontier.append(cell)
+        else:
+            labels[cell] = _TIE
+    while frontier:
+        next_frontier = array('i')
+        for cell in frontier:
+            label = labels[cell]
+            for neighbor in (cell - stride, cell - 1, cell + 1, cell + stride):
+                neighbor_label = labels[neighbor]
+                if neighbor_label == _UNSEEN:
+                    labels[neighbor] = label
+                    reached[neighbor] = 1
+                    next_frontier.append(neighbor)
+                elif reached[neighbor] and neighbor_label != label:
+                    labels[neighbor] = _TIE
+        for cell in next_frontier:
+            reached[cell] = 0
+        frontier = next_frontier
+    matrix = array('i')
+    for row in range(1, height + 1):
+        matrix.extend(labels[row * stride + 1:row * stride + width + 1])
+    return matrix
 
 
 def _get_total_distance(point: Point, coordinates: List[Point]) -> int:
@@ -200,57 +497,622 @@ def _get_total_distance(point: Point, coordinates: List[Point]) -> int:
         [_manhattan_distance(point, coordinate) for coordinate in coordinates])
 
 
-def get_largest_finite_area(input_string: str) -> int:
+def _largest_finite_area_matrix(coordinates: List[Point]) -> int:
+    """Finds the size of the largest finite area by filling a matrix.
+
+    Args:
+        coordinates: A list of normalized coordinates.
+
+    Returns:
+        An integer representing the size of the largest finite area.
+    """
+    width = max([c[0] for c in coordinates]) + 1
+    height = max([c[1] for c in coordinates]) + 1
+    matrix = _build_matrix(width, height)
+    _fill_matrix(matrix, width, coordinates)
+    return _get_largest_finite_area_size(matrix, width, len(coordinates))
+
+
+def _largest_finite_area_numpy(coordinates: List[Point]) -> int:
+    """Finds the size of the largest finite area with NumPy.
+
+    Args:
+        coordinates: A list of normalized coordinates.
+
+    Returns:
+        An integer representing the size of the largest finite area.
+    """
+    width = max([c[0] for c in coordinates]) + 1
+    height = max([c[1] for c in coordinates]) + 1
+    matrix = _fill_label_grid(coordinates, width, height).ravel()
+    return _get_largest_finite_area_size(matrix, width, len(coordinates))
+
+
+def _largest_finite_area_flood(coordinates: List[Point]) -> int:
+    """Finds the size of the largest finite area by flood filling a grid.
+
+    Args:
+        coordinates: A list of normalized coordinates.
+
+    Returns:
+        An integer representing the size of the largest finite area.
+    """
+    width = max([c[0] for c in coordinates]) + 1
+    height = max([c[1] for c in coordinates]) + 1
+    matrix = _flood_fill(coordinates, width, height)
+    return _get_largest_finite_area_size(matrix, width, len(coordinates))
+
+
+def _get_axis_distances(positions: List[int], start: int,
+                        stop: int) -> List[int]:
+    """Computes total distances along a single axis.
+
+    Args:
+        positions: The positions of the coordinates along the axis.
+        start: The first position to compute the total distance of.
+        stop: The position after the last one to compute the total distance
+            of.
+
+    Returns:
+        A list where the n-th value is the sum of the distances between
+        position start + n and each of the given positions.
+    """
+    positions = sorted(positions)
+    passed = bisect.bisect_right(positions, start)
+    total_distance = sum([abs(start - position) for position in positions])
+    distances = []
+    for position in range(start, stop):
+        distances.append(total_distance)
+        while passed < len(positions) and positions[passed] <= position:
+            passed += 1
+        total_distance += passed - (len(positions) - passed)
+    return distances
+
+
+@memory.phase('compute')
+def _safe_area_matrix(coordinates: List[Point], max_distance: int) -> int:
+    """Finds the size of the safe area inside the coordinates' bounding box.
+
+    Args:
+        coordinates: A list of normalized coordinates.
+        max_distance: The total distance locations must stay under.
+
+    Returns:
+        An integer representing the number of safe locations inside the
+        bounding box.
+    """
+    width = max([c[0] for c in coordinates]) + 1
+    height = max([c[1] for c in coordinates]) + 1
+    safe_area_size = 0
+    for row in range(height):
+        for col in range(width):
+            if _get_total_distance((col, row), coordinates) < max_distance:
+                safe_area_size += 1
+    return safe_area_size
+
+
+@memory.phase('compute')
+def _safe_area_separable(coordinates: List[Point], max_distance: int) -> int:
+    """Finds the size of the safe area from total distances along each axis.
+
+    Args:
+        coordinates: A list of normalized coordinates.
+        max_distance: The total distance locations must stay under.
+
+    Returns:
+        An integer representing the number of safe locations.
+    """
+    # Each step away from the bounding box adds len(coordinates) to the total
+    # distance, so no safe location is further away than this.
+    margin = max(0, (max_distance - 1) // len(coordinates))
+    xs = [c[0] for c in coordinates]
+    ys = [c[1] for c in coordinates]
+    col_distances = _get_axis_distances(xs, -margin, max(xs) + margin + 1)
+    row_distances = _get_axis_distances(ys, -margin, max(ys) + margin + 1)
+    return _count_safe_cells(col_distances, row_distances, max_distance)
+
+
+def _count_safe_cells(col_distances: List[int], row_distances: List[int],
+                      max_distance: int) -> int:
+    """Counts the cells with a total distance less than max_distance.
+
+    Args:
+        col_distances: The total horizontal distance of each column. This list
+            is sorted in-place.
+        row_distances: The total vertical distance of each row. This list is
+            sorted in-place.
+        max_distance: The total distance cells must stay under.
+
+    Returns:
+        The number of combinations of a column and a row whose total distances
+        add up to less than max_distance.
+    """
+    col_distances.sort()
+    row_distances.sort()
+    safe_cells = 0
+    safe_rows = len(row_distances)
+    for col_distance in col_distances:
+        while (safe_rows and
+               col_distance + row_distances[safe_rows - 1] >= max_distance):
+            safe_rows -= 1
+        if not safe_rows:
+            break
+        safe_cells += safe_rows
+    return safe_cells
+
+
+class _TileResult(NamedTuple):  # pylint: disable=R0903
+    """Represents what a tile of the grid contributes to the answers.
+
+    Attributes:
+        area_sizes: The number of cells in the tile belonging to each area,
+            indexed by the index of the area's coordinate.
+        border_labels: The indices of the coordinates whose areas touch the
+            side of the grid within the tile.
+        safe_cells: The number of cells in the tile which have a total distance
+            to all coordinates of less than max_distance.
+    """
+    area_sizes: List[int]
+    border_labels: Set[int]
+    safe_cells: int
+
+
+def _label_window(coordinates: List[Point], left: int, top: int, right: int,
+                  bottom: int) -> array:
+    """Finds the closest coordinate of each cell in a window of the grid.
+
+    Args:
+        coordinates: A list of normalized coordinates.
+        left: The first column of the window.
+        top: The first row of the window.
+        right: The column after the last column of the window.
+        bottom: The row after the last row of the window.
+
+    Returns:
+        A flat array of labels in row-major order, where each cell contains the
+        index of the closest coordinate, or -1 in case of tie.
+    """
+    matrix = _build_matrix(right - left, bottom - top)
+    _fill_matrix(matrix, right - left, coordinates, left, top)
+    return matrix
+
+
+def _process_tile(coordinates: List[Point], width: int, height: int,
+                  max_distance: Optional[int],
+                  tile: Tuple[int, int, int, int]) -> _TileResult:
+    """Computes what a single tile of the grid contributes to the answers.
+
+    Args:
+        coordinates: A list of normalized coordinates.
+        width: Width of the coordinates' bounding box.
+        height: Height of the coordinates' bounding box.
+        max_distance: The total distance safe cells must stay under. If None,
+            the tile's areas are measured instead of counting safe cells.
+        tile: The left, top, right and bottom sides of the tile. The right and
+            bottom sides are excluded.
+
+    Returns:
+        The tile's area sizes, border labels and safe cells.
+    """
+    left, top, right, bottom = tile
+    area_sizes, border_labels, safe_cells = [], set(), 0
+    if max_distance is None:
+        tile_width = right - left
+        # A tile's size is bounded by _TILE_SIZE, so the memory budget, meant
+        # for whole grids, does not apply to it.
+        with memory.limit(None):
+            labels = _label_window(coordinates, left, top, right, bottom)
+        area_sizes = _get_area_sizes(labels, len(coordinates))
+        if top == 0:
+            border_labels.update(labels[:tile_width])
+        if bottom == height:
+            border_labels.update(labels[-tile_width:])
+        if left == 0:
+            border_labels.update(labels[::tile_width])
+        if right == width:
+            border_labels.update(labels[tile_width - 1::tile_width])
+        border_labels.discard(_TIE)
+    else:
+        col_distances = _get_axis_distances([c[0] for c in coordinates], left,
+                                            right)
+        row_distances = _get_axis_distances([c[1] for c in coordinates], top,
+                                            bottom)
+        safe_cells = _count_safe_cells(col_distances, row_distances,
+                                       max_distance)
+    return _TileResult(area_sizes, border_labels, safe_cells)
+
+
+@memory.phase('compute')
+def _solve_tiled(coordinates: List[Point],
+                 max_distance: Optional[int] = None,
+                 workers: int = None) -> _TileResult:
+    """Processes the grid tile by tile in a pool of worker processes.
+
+    Args:
+        coordinates: A list of normalized coordinates.
+        max_distance: The total distance safe cells must stay under. If None,
+            the areas of the coordinates inside their bounding box are measured
+            instead of counting safe cells.
+        workers: The number of worker processes. Defaults to the number of
+            processors on the machine.
+
+    Returns:
+        The merged area sizes, border labels and safe cells of all tiles.
+    """
+    width = max([c[0] for c in coordinates]) + 1
+    height = max([c[1] for c in coordinates]) + 1
+    margin = 0
+    if max_distance is not None:
+        margin = max(0, (max_distance - 1) // len(coordinates))
+    tiles = [(left, top, min(left + _TILE_SIZE, width + margin),
+              min(top + _TILE_SIZE, height + margin))
+             for top in range(-margin, height + margin, _TILE_SIZE)
+             for left in range(-margin, width + margin, _TILE_SIZE)]
+    process_tile = functools.partial(_process_tile, coordinates, width, height,
+                                     max_distance)
+    area_sizes, border_labels, safe_cells = [0] * len(coordinates), set(), 0
+    import concurrent.futures  # pylint: disable=C0415
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        for result in executor.map(process_tile, tiles):
+            for label, area in enumerate(result.area_sizes):
+                area_sizes[label] += area
+            border_labels.update(result.border_labels)
+            safe_cells += result.safe_cells
+    return _TileResult(area_sizes, border_labels, safe_cells)
+
+
+def _largest_finite_area_tiled(coordinates: List[Point]) -> int:
+    """Finds the size of the largest finite area tile by tile.
+
+    Args:
+        coordinates: A list of normalized coordinates.
+
+    Returns:
+        An integer representing the size of the largest finite area.
+    """
+    result = _solve_tiled(coordinates)
+    finite_areas = [
+        area for label, area in enumerate(result.area_sizes)
+        if label not in result.border_labels
+    ]
+    return max(finite_areas, default=0)
+
+
+def _safe_area_tiled(coordinates: List[Point], max_distance: int) -> int:
+    """Finds the size of the safe area tile by tile.
+
+    Args:
+        coordinates: A list of normalized coordinates.
+        max_distance: The total distance locations must stay under.
+
+    Returns:
+        An integer representing the number of safe locations.
+    """
+    return _solve_tiled(coordinates, max_distance).safe_cells
+
+
+def _get_neighbors(coordinates: List[Point],
+                   index: int) -> List[Tuple[int, int, int, int]]:
+    """Sorts the other coordinates by distance to a coordinate.
+
+    Args:
+        coordinates: A list of coordinates.
+        index: The index of the coordinate.
+
+    Returns:
+        The distance to the coordinate, column, row and index of every other
+        coordinate, closest first.
+    """
+    point = coordinates[index]
+    return sorted(
+        (_manhattan_distance(point, other), other[0], other[1], other_index)
+        for other_index, other in enumerate(coordinates)
+        if other_index != index)
+
+
+def _is_closest(point: Point, neighbors: List[Tuple[int, int, int, int]],
+                col: int, row: int) -> bool:
+    """Checks whether a cell belongs to a coordinate's area.
+
+    A neighbor at least as close to the cell as the coordinate is at most
+    twice the cell's distance away from the coordinate, so neighbors are only
+    looked at up to that distance.
+
+    Args:
+        point: The coordinate.
+        neighbors: The other coordinates, as given by _get_neighbors.
+        col: The column of the cell.
+        row: The row of the cell.
+
+    Returns:
+        Whether the coordinate is strictly closer to the cell than all others.
+    """
+    distance = abs(point[0] - col) + abs(point[1] - row)
+    for separation, other_col, other_row, _ in neighbors:
+        if separation > 2 * distance:
+            break
+        if abs(other_col - col) + abs(other_row - row) <= distance:
+            return False
+    return True
+
+
+def _get_closest(coordinates: List[Point],
+                 neighbors: Dict[int, List[Tuple[int, int, int, int]]],
+                 reference: int, col: int, row: int) -> Tuple[int, int]:
+    """Finds the closest coordinate to a cell, starting from a nearby one.
+
+    A coordinate at most as far from the cell as the reference coordinate is
+    at most twice that distance away from the reference, so only the
+    reference's neighbors up to that distance are looked at.
+
+    Args:
+        coordinates: A list of coordinates.
+        neighbors: A dictionary that maps coordinates to their neighbors as
+            given by _get_neighbors, filled as needed.
+        reference: The index of a coordinate close to the cell.
+        col: The column of the cell.
+        row: The row of the cell.
+
+    Returns:
+        The index of the closest coordinate, or -1 in case of tie, and the
+        index of one of the closest coordinates.
+    """
+    if reference not in neighbors:
+        neighbors[reference] = _get_neighbors(coordinates, reference)
+    reference_distance = _manhattan_distance(coordinates[reference],
+                                             (col, row))
+    min_distance, closest = reference_distance, [reference]
+    for separation, other_col, other_row, other in neighbors[reference]:
+        if separation > min_distance + reference_distance:
+            break
+        distance = abs(other_col - col) + abs(other_row - row)
+        if distance < min_distance:
+            min_distance, closest = distance, [other]
+        elif distance == min_distance:
+            closest.append(other)
+    return (closest[0] if len(closest) == 1 else -1), closest[0]
+
+
+def _get_unbounded_labels(coordinates: List[Point]) -> Set[int]:
+    """Finds which coordinates have infinite areas.
+
+    Args:
+        coordinates: A list of normalized coordinates.
+
+    Returns:
+        The indices of the coordinates whose areas touch the side of the
+        coordinates' bounding box.
+    """
+    width = max([c[0] for c in coordinates]) + 1
+    height = max([c[1] for c in coordinates]) + 1
+    # Walks around the side, so that the closest coordinate of a cell is a
+    # good reference for the next cell.
+    side = [(col, 0) for col in range(width)]
+    side += [(width - 1, row) for row in range(height)]
+    side += [(col, height - 1) for col in range(width - 1, -1, -1)]
+    side += [(0, row) for row in range(height - 1, -1, -1)]
+    neighbors = {}
+    unbounded_labels, reference = set(), 0
+    for col, row in side:
+        label, reference = _get_closest(coordinates, neighbors, reference, col,
+                                        row)
+        unbounded_labels.add(label)
+    return unbounded_labels - {_TIE}
+
+
+def _measure_area(coordinates: List[Point], index: int) -> int:
+    """Measures the area of a coordinate, assuming it is finite.
+
+    Args:
+        coordinates: A list of coordinates.
+        index: The index of the coordinate.
+
+    Returns:
+        The number of cells in the coordinate's area.
+    """
+    point = coordinates[index]
+    neighbors = _get_neighbors(coordinates, index)
+    col, row = point
+    area_size = 0
+    for rows in (range(row, -1, -1), itertools.count(row + 1)):
+        for current_row in rows:
+            if not _is_closest(point, neighbors, col, current_row):
+                break
+            left = right = col
+            while _is_closest(point, neighbors, left - 1, current_row):
+                left -= 1
+            while _is_closest(point, neighbors, right + 1, current_row):
+                right += 1
+            area_size += right - left + 1
+    return area_size
+
+
+@memory.phase('compute')
+def _largest_finite_area_geometric(coordinates: List[Point]) -> int:
+    """Finds the size of the largest finite area by measuring finite areas.
+
+    Args:
+        coordinates: A list of normalized coordinates.
+
+    Returns:
+        An integer representing the size of the largest finite area.
+    """
+    unbounded_labels = _get_unbounded_labels(coordinates)
+    finite_areas = [
+        _measure_area(coordinates, index)
+        for index, _ in enumerate(coordinates)
+        if index not in unbounded_labels
+    ]
+    return max(finite_areas, default=0)
+
+
+_AREA_ENGINES: Dict[str, Callable[[List[Point]], int]] = {
+    'matrix': _largest_finite_area_matrix,
+    'numpy': _largest_finite_area_numpy,
+    'flood': _largest_finite_area_flood,
+    'tiled': _largest_finite_area_tiled,
+    'geometric': _largest_finite_area_geometric,
+}
+
+
+# The engine used when the default one exceeds the memory budget.
+_LOW_MEMORY_AREA_ENGINE = 'geometric'
+
+
+def _largest_finite_area(coordinates: List[Point], engine: str = None) -> int:
+    """Finds the size of the largest finite area with a given engine.
+
+    Args:
+        coordinates: A list of normalized coordinates.
+        engine: The name of the engine, or None to use the default engine for
+            the current backend, or the low-memory engine if the default one
+            exceeds the memory budget.
+
+    Returns:
+        An integer representing the size of the largest finite area.
+
+    Raises:
+        memory.MemoryBudgetExceeded: The given engine exceeds the memory
+            budget.
+    """
+    if engine is not None:
+        return _AREA_ENGINES[engine](coordinates)
+    engine = 'numpy' if backends.get_backend() == backends.NUMPY else 'flood'
+    try:
+        return _AREA_ENGINES[engine](coordinates)
+    except memory.MemoryBudgetExceeded:
+        return _AREA_ENGINES[_LOW_MEMORY_AREA_ENGINE](coordinates)
+
+
+_SAFE_AREA_ENGINES: Dict[str, Callable[[List[Point], int], int]] = {
+    'matrix': _safe_area_matrix,
+    'separable': _safe_area_separable,
+    'tiled': _safe_area_tiled,
+}
+
+
+@cache.cached()
+@memory.measured
+def get_largest_finite_area(input_string: str, engine: str = None) -> int:
     """Finds the size of the largest finite area.
 
     Args:
         input_string: The puzzle input.
+        engine: The name of the engine that computes the areas, one of
+            'matrix', 'numpy', 'flood', 'tiled' and 'geometric'. Defaults to
+            'numpy' with the NumPy backend and to 'flood' otherwise, or to
+            'geometric' if the default exceeds the memory budget.
 
     Returns:
         An integer representing the size of the largest finite area.
+
+    Raises:
+        memory.MemoryBudgetExceeded: The given engine exceeds the memory
+            budget.
     """
+    if engine is not None and engine not in _AREA_ENGINES:
+        raise ValueError(f'unknown engine: {engine}')
     coordinates = _read_coordinates(input_string)
     coordinates = _normalize_coordinates(coordinates)
-    matrix = _build_matrix(
-        max([c[0] for c in coordinates]) + 1,
-        max([c[1] for c in coordinates]) + 1)
-    _fill_matrix(matrix, coordinates)
-    area_sizes = _get_area_sizes(matrix)
-    infinite_area_points = _get_infinite_area_points(matrix)
-    return max([
-        area for point, area in area_sizes.items()
-        if point not in infinite_area_points
-    ])
-
-
-def get_safe_area(input_string: str, max_distance: int = 10000) -> int:
+    return _largest_finite_area(coordinates, engine)
+
+
+@cache.cached()
+@memory.measured
+def get_safe_area(input_string: str,
+                  max_distance: int = 10000,
+                  engine: str = 'separable') -> int:
     """Finds the size of the safe area.
 
     Args:
         input_string: The puzzle input.
+        max_distance: The total distance locations must stay under.
+        engine: The name of the engine that computes the safe area, one of
+            'separable', 'matrix' and 'tiled'. The matrix engine only
+            considers locations inside the coordinates' bounding box.
 
     Returns:
         An integer representing the size of the area containing all locations
             which have a total distance to all coordinates of less than
             max_distance.
     """
+    if engine not in _SAFE_AREA_ENGINES:
+        raise ValueError(f'unknown engine: {engine}')
     coordinates = _read_coordinates(input_string)
     coordinates = _normalize_coordinates(coordinates)
-    matrix = _build_matrix(
-        max([c[0] for c in coordinates]) + 1,
-        max([c[1] for c in coordinates]) + 1)
-    safe_area_size = 0
-    for row, _ in enumerate(matrix):
-        for col, _ in enumerate(matrix[row]):
-            if _get_total_distance((col, row), coordinates) < max_distance:
-                safe_area_size += 1
-    return safe_area_size
+    return _SAFE_AREA_ENGINES[engine](coordinates, max_distance)
+
+
+@cache.cached()
+@memory.measured
+def solve(input_string: str, max_distance: int = 10000) -> Tuple[int, int]:
+    """Solves both parts of the day's puzzle, reading the input once.
+
+    Both parts use their default engines.
+
+    Args:
+        input_string: The puzzle input.
+        max_distance: The total distance locations must stay under.
+
+    Returns:
+        The size of the largest finite area and the size of the safe area.
+    """
+    coordinates = _normalize_coordinates(_read_coordinates(input_string))
+    return (_largest_finite_area(coordinates),
+            _safe_area_separable(coordinates, max_distance))
+
+
+def solve_batch(inputs: Iterable[batch.Input],
+                max_distance: int = 10000,
+                pool: Optional[str] = 'process',
+                workers: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """Solves both parts of the day's puzzle for many inputs.
+
+    See batch.solve_batch for details.
+
+    Args:
+        inputs: The puzzle inputs, or paths to them.
+        max_distance: The total distance locations must stay under.
+        pool: The kind of pool the inputs are solved in.
+        workers: The number of workers in the pool.
+
+    Yields:
+        The answers to both parts of the puzzle for each input, in order.
+    """
+    solve_input = functools.partial(solve, max_distance=max_distance)
+    return batch.solve_batch(solve_input, inputs, pool, workers)
 
 
 def _run_tests() -> None:
     """Tests solution."""
-    assert get_largest_finite_area('1, 1\n1, 6\n8, 3\n3, 4\n5, 5\n8, 9') == 17
-    assert get_safe_area('1, 1\n1, 6\n8, 3\n3, 4\n5, 5\n8, 9', 32) == 16
+    for engine in _AREA_ENGINES:
+        if engine == 'numpy' and utils.get_numpy() is None:
+            continue
+        assert get_largest_finite_area('1, 1\n1, 6\n8, 3\n3, 4\n5, 5\n8, 9',
+                                       engine) == 17
+    for engine in _SAFE_AREA_ENGINES:
+        assert get_safe_area('1, 1\n1, 6\n8, 3\n3, 4\n5, 5\n8, 9', 32,
+                             engine) == 16
+    # The safe area can extend beyond the coordinates' bounding box.
+    assert get_safe_area('0, 0\n2, 0', 5) == 11
+    assert get_safe_area('0, 0\n2, 0', 5, 'matrix') == 3
+    assert list(
+        solve_batch(['1, 1\n1, 6\n8, 3\n3, 4\n5, 5\n8, 9', '0, 0\n2, 0'],
+                    32,
+                    pool='thread')) == [(17, 16), (0, 479)]
+    # Filling a grid of a million cells does not fit in 1 MB, so the largest
+    # finite area is measured without a grid.
+    wide_input = ('0, 0\n1000, 1000\n500, 500\n500, 400\n400, 500\n600, 500\n'
+                  '500, 600')
+    with cache.bypass(), memory.limit(1 << 20), memory.record() as reports:
+        assert get_largest_finite_area(wide_input) == 9801
+        try:
+            get_largest_finite_area(wide_input, 'flood')
+            raise AssertionError('memory budget not enforced')
+        except memory.MemoryBudgetExceeded:
+            pass
+    assert {report.phase for report in reports
+           } == {'parse', 'build', 'compute', 'total'}
 
 
 def _print_answers(largest_finite_area: int = None,
@@ -266,11 +1128,8 @@ def _print_answers(largest_finite_area: int = None,
 
 
 def main() -> None:
-    """Runs tests and prints answers to day's puzzle."""
-    _run_tests()
-    input_string = utils.read_input(6)
-    largest_finite_area = get_largest_finite_area(input_string)
-    safe_area = get_safe_area(input_string)
+    """Prints answers to day's puzzle."""
+    largest_finite_area, safe_area = solve(utils.read_input(6))
     _print_answers(largest_finite_area, safe_area)
 
 
@@ -1,22 +1,272 @@
 """Solution to day 07 of the Advent of Code."""
 
+import functools
 import heapq
+import itertools
+import re
 import string
-from typing import Any, Dict, List, Set, Tuple
+from array import array
+from typing import (Any, Awaitable, Callable, Dict, Iterable, Iterator, List,
+                    NamedTuple, Optional, Tuple, Union)
 
-import utils
+from . import batch, cache, memory, utils
+
+
+# Matches a dependency, with any step names that are not blank.
+_DEPENDENCY_PATTERN = re.compile(
+    r'^Step (.+?) must be finished before step (.+?) can begin\.?$')
+# Matches a duration, a whole number of seconds.
+_DURATION_PATTERN = re.compile('[0-9]+')
+
+# States of the vertices during a depth-first search.
+_VISITING = 1
+_VISITED = 2
+
+
+class StepTiming(NamedTuple):  # pylint: disable=R0903
+    """Represents when a step was worked on.
+
+    Attributes:
+        worker: The worker that completed the step.
+        start: The time at which the worker started the step.
+        finish: The time at which the worker completed the step.
+    """
+    worker: int
+    start: float
+    finish: float
+
+
+class CycleError(ValueError):
+    """Raised when a graph that should be acyclic contains a cycle.
+
+    Attributes:
+        cycle: A list of vertices forming a cycle, where the first and last
+            vertices are the same.
+    """
+
+    def __init__(self, cycle: List[Any]) -> None:
+        super().__init__(f'graph contains a cycle: {cycle}')
+        self.cycle = cycle
+
+
+def _depth_first_order(vertices: Iterable[Any],
+                       children: Callable[[Any], Iterable[Any]]) -> List[Any]:
+    """Provides vertices in topological order with a depth-first search.
+
+    Applies a DFS-like search on the graph, with an explicit stack instead of
+    recursion so that long chains of vertices do not hit Python's recursion
+    limit. Once the search is complete for all of a vertex's children, the
+    vertex is added to the reversed topological order.
+
+    Args:
+        vertices: All vertices of the graph.
+        children: A function that provides the children of a vertex.
+
+    Returns:
+        A list of vertices in topological order.
+
+    Raises:
+        CycleError: The graph contains a cycle.
+    """
+    order = []
+    states = {}
+    for root in vertices:
+        if root in states:
+            continue
+        states[root] = _VISITING
+        stack = [(root, iter(children(root)))]
+        while stack:
+            vertex, vertex_children = stack[-1]
+            for child in vertex_children:
+                state = states.get(child)
+                if state is None:
+                    states[child] = _VISITING
+                    stack.append((child, iter(children(child))))
+                    break
+                if state == _VISITING:
+                    path = [vertex for vertex, _ in stack]
+                    raise CycleError(path[path.index(child):] + [child])
+            else:
+                stack.pop()
+                states[vertex] = _VISITED
+                order.append(vertex)
+    order.reverse()
+    return order
+
+
+def _lexicographic_order(parent_count: Union[Dict[Any, int], array],
+                         available: List[Any],
+                         children: Callable[[Any], Iterable[Any]]) -> List[Any]:
+    """Provides vertices in topological order, smallest available first.
+
+    See https://adventofcode.com/2018/day/7 Part 1 for details.
+
+    Args:
+        parent_count: The number of parents of each vertex, either as a
+            dictionary or as an array indexed by vertex. It is modified
+            in-place.
+        available: The vertices without parents.
+        children: A function that provides the children of a vertex.
+
+    Returns:
+        A list of vertices in topological order. Vertices that are part of or
+        depend on a cycle are missing.
+    """
+    completed = []
+    heapq.heapify(available)
+    while available:
+        vertex = heapq.heappop(available)
+        completed.append(vertex)
+        for child in children(vertex):
+            parent_count[child] -= 1
+            if parent_count[child] == 0:
+                heapq.heappush(available, child)
+    return completed
+
+
+def _simulate_workers(parent_count: Union[Dict[Any, int], array],
+                      available: List[Any],
+                      children: Callable[[Any], Iterable[Any]],
+                      durations: Union[Dict[Any, int], List[int]],
+                      workers: int,
+                      schedule: Dict[Any, StepTiming] = None
+                     ) -> Tuple[List[Any], int]:
+    """Simulates workers completing steps, smallest available step first.
+
+    See https://adventofcode.com/2018/day/7 Part 2 for details.
+
+    Instead of advancing time one unit at a time, the simulation jumps from one
+    step completion to the next, so its cost does not depend on the durations
+    of the steps. Steps completing at the same time are completed in the order
+    of the workers working on them, and available steps are assigned to idle
+    workers in the order of the workers.
+
+    Args:
+        parent_count: The number of parents of each step, either as a
+            dictionary or as an array indexed by step. It is modified in-place.
+        available: The steps without parents.
+        children: A function that provides the steps depending on a step.
+        durations: The amount of time required to complete each step, either
+            as a dictionary or as a list indexed by step.
+        workers: The number of workers working on the steps.
+        schedule: If given, a dictionary to record the timing of each step in.
+
+    Returns:
+        A list of steps in completion order, and the time at which the last
+        step was completed. Steps that are part of or depend on a cycle are
+        missing.
+
+    Raises:
+        ValueError: There are no workers.
+    """
+    if workers < 1:
+        raise ValueError(f'at least one worker is needed, got {workers}')
+    completed = []
+    heapq.heapify(available)
+    idle_workers = list(range(workers))
+    # Steps in progress as (completion time, worker, step) tuples.
+    in_progress = []
+    time_count = 0
+    while True:
+        while idle_workers and available:
+            worker = heapq.heappop(idle_workers)
+            step = heapq.heappop(available)
+            # Steps always take at least one time unit.
+            completion_time = time_count + max(durations[step], 1)
+            heapq.heappush(in_progress, (completion_time, worker, step))
+            if schedule is not None:
+                schedule[step] = StepTiming(worker, time_count, completion_time)
+
+        if not in_progress:
+            break
+
+        time_count = in_progress[0][0]
+        while in_progress and in_progress[0][0] == time_count:
+            _, worker, step = heapq.heappop(in_progress)
+            completed.append(step)
+            heapq.heappush(idle_workers, worker)
+            for child in children(step):
+                parent_count[child] -= 1
+                if parent_count[child] == 0:
+                    heapq.heappush(available, child)
+
+    return completed, time_count
+
+
+def _critical_path(order: List[Any], children: Callable[[Any], Iterable[Any]],
+                   durations: Union[Dict[Any, int], List[int]]
+                  ) -> Tuple[List[Any], int]:
+    """Finds the longest chain of dependent steps.
+
+    Going through the steps in topological order, the earliest a step can start
+    is the latest time at which one of its parents finishes. The parent that
+    finishes last is remembered, so the chain of steps leading to the step that
+    finishes last can be followed backwards.
+
+    Args:
+        order: All steps in topological order.
+        children: A function that provides the steps depending on a step.
+        durations: The amount of time required to complete each step, either
+            as a dictionary or as a list indexed by step. Steps always take at
+            least one time unit.
+
+    Returns:
+        The steps on the critical path in order, and the time at which the last
+        of them finishes if there is no limit on the number of workers.
+    """
+    earliest_start = {}
+    critical_parent = {}
+    last_step, makespan = None, 0
+    for step in order:
+        finish = earliest_start.get(step, 0) + max(durations[step], 1)
+        if finish > makespan:
+            last_step, makespan = step, finish
+        for child in children(step):
+            if finish > earliest_start.get(child, 0):
+                earliest_start[child] = finish
+                critical_parent[child] = step
+    path = []
+    step = last_step
+    while step is not None:
+        path.append(step)
+        step = critical_parent.get(step)
+    path.reverse()
+    return path, makespan
 
 
 class Graph:
     """Represents a graph.
 
+    The graph keeps a topological order of its vertices up to date as edges
+    are added, with the Pearce-Kelly algorithm: when a new edge goes against
+    the current order, only the vertices whose positions lie between the
+    edge's ends and that are reachable from (or reach) the edge are reordered.
+    If an edge closes a cycle, the order is dropped until it is needed again.
+    The order in which Part 1 of the puzzle completes the steps is cached as
+    well, and survives new edges that agree with it.
+
     Attributes:
         adj_list: A dictionary that maps each vertex of the graph to the
-            vertices it is connected to.
+            vertices it is connected to. Those vertices are the keys of a
+            dictionary, which ignores duplicate edges but keeps them in the
+            order they were added.
+        parents: A dictionary that maps each vertex of the graph to the
+            vertices connected to it, stored like adj_list.
+        order: A dictionary that maps each vertex to its position in a
+            topological order, or None if no order is currently known.
+        ordered_vertices: The vertices of the graph in the topological order
+            described by order, or None.
+        specific_order: A dictionary that maps each vertex to its position in
+            the order provided by specific_topological_sort, or None if that
+            order must be computed again.
     """
 
     def __init__(self) -> None:
         self._adj_list = {}
+        self._parents = {}
+        self._order = {}
+        self._ordered_vertices = []
+        self._specific_order = None
 
     def add_vertex(self, vertex: Any) -> None:
         """Adds a vertex to the graph.
@@ -25,38 +275,90 @@ class Graph:
             vertex: The vertex to add.
         """
         if vertex not in self._adj_list:
-            self._adj_list[vertex] = []
+            self._adj_list[vertex] = {}
+            self._parents[vertex] = {}
+            if self._order is not None:
+                self._order[vertex] = len(self._ordered_vertices)
+                self._ordered_vertices.append(vertex)
+            self._specific_order = None
 
     def add_edge(self, u: Any, v: Any) -> None:  # pylint: disable=C0103
         """Adds an edge to the graph.
 
+        Adding an edge that is already in the graph has no effect.
+
         Args:
             u: The vertex the edge comes from.
             v: The vertex the edge goes to.
         """
         self.add_vertex(u)
         self.add_vertex(v)
-        self._adj_list[u].append(v)
+        if v in self._adj_list[u]:
+            return
+        self._adj_list[u][v] = None
+        self._parents[v][u] = None
+        if self._order is not None and self._order[u] >= self._order[v]:
+            if not self._reorder(u, v):
+                self._order = self._ordered_vertices = None
+        if (self._specific_order is not None and
+                self._specific_order[u] >= self._specific_order[v]):
+            self._specific_order = None
 
-    def _topological_sort_worker(self, vertex: Any, visited: Set[Any],
-                                 stack: List[Any]):
-        """A recursive worker function use by topological sort.
+    def remove_edge(self, u: Any, v: Any) -> None:  # pylint: disable=C0103
+        """Removes an edge from the graph.
 
-        Applies a DFS-like search on the graph, starting at the given vertex.
-        Once the search is complete for all of the vertex's children, the vertex
-        is added to the shared stack.
+        The topological order stays valid, since removing an edge only removes
+        a constraint on the order.
 
         Args:
-            vertex: The vertex to start the search from.
-            visited: A set containing all vertices that have been visited.
-            stack: A stack containing the vertices in reversed topological
-                order.
+            u: The vertex the edge comes from.
+            v: The vertex the edge goes to.
+
+        Raises:
+            KeyError: The edge is not in the graph.
         """
-        visited.add(vertex)
-        for child in self._adj_list[vertex]:
-            if child not in visited:
-                self._topological_sort_worker(child, visited, stack)
-        stack.append(vertex)
+        del self._adj_list[u][v]
+        del self._parents[v][u]
+        self._specific_order = None
+
+    def _reorder(self, u: Any, v: Any) -> bool:
+        """Restores the topological order after adding an edge against it.
+
+        Args:
+            u: The vertex the new edge comes from.
+            v: The vertex the new edge goes to.
+
+        Returns:
+            Whether the order could be restored. It cannot if the new edge
+            closes a cycle.
+        """
+        order = self._order
+        lower, upper = order[v], order[u]
+        if u == v:
+            return False
+        # Vertices reachable from v which are before u in the order.
+        forward, seen = [v], {v}
+        for vertex in forward:
+            for child in self._adj_list[vertex]:
+                if child == u:
+                    return False
+                if order[child] < upper and child not in seen:
+                    forward.append(child)
+                    seen.add(child)
+        # Vertices reaching u which are after v in the order.
+        backward, seen = [u], {u}
+        for vertex in backward:
+            for parent in self._parents[vertex]:
+                if order[parent] > lower and parent not in seen:
+                    backward.append(parent)
+                    seen.add(parent)
+        forward.sort(key=order.__getitem__)
+        backward.sort(key=order.__getitem__)
+        positions = sorted(order[vertex] for vertex in forward + backward)
+        for vertex, position in zip(backward + forward, positions):
+            order[vertex] = position
+            self._ordered_vertices[position] = vertex
+        return True
 
     def topological_sort(self) -> List[Any]:
         """Provides the graph's vertices in topological order.
@@ -65,14 +367,69 @@ class Graph:
 
         Returns:
             A list of vertices in topological order.
+
+        Raises:
+            CycleError: The graph contains a cycle.
+        """
+        if self._order is None:
+            ordered_vertices = _depth_first_order(self._adj_list,
+                                                  self._adj_list.__getitem__)
+            self._order = {
+                vertex: position
+                for position, vertex in enumerate(ordered_vertices)
+            }
+            self._ordered_vertices = ordered_vertices
+        return list(self._ordered_vertices)
+
+    def kahn_topological_sort(self) -> List[Any]:
+        """Provides the graph's vertices in topological order.
+
+        Uses Kahn's algorithm: vertices are completed in the order in which all
+        of their parents have been completed.
+
+        Returns:
+            A list of vertices in topological order.
+
+        Raises:
+            CycleError: The graph contains a cycle.
+        """
+        parent_count = self._count_parents()
+        order = [
+            vertex for vertex, count in parent_count.items() if count == 0
+        ]
+        # The list is used as a queue: it grows while being iterated over.
+        for vertex in order:
+            for child in self._adj_list[vertex]:
+                parent_count[child] -= 1
+                if parent_count[child] == 0:
+                    order.append(child)
+        if len(order) < len(self._adj_list):
+            raise CycleError(self.find_cycle())
+        return order
+
+    def find_cycle(self) -> Optional[List[Any]]:
+        """Looks for a cycle in the graph.
+
+        Returns:
+            A list of vertices forming a cycle, where the first and last
+            vertices are the same, or None if the graph is acyclic.
+        """
+        try:
+            self.topological_sort()
+        except CycleError as error:
+            return error.cycle
+        return None
+
+    def _count_parents(self) -> Dict[Any, int]:
+        """Counts the parents of each vertex.
+
+        Returns:
+            A dictionary that maps each vertex to the number of edges going to
+            it.
         """
-        visited = set()
-        stack = []
-        for vertex, _ in self._adj_list.items():
-            if vertex not in visited:
-                self._topological_sort_worker(vertex, visited, stack)
-        stack.reverse()
-        return stack
+        return {
+            vertex: len(parents) for vertex, parents in self._parents.items()
+        }
 
     def specific_topological_sort(self) -> List[Any]:
         """Provides the graph's vertices in a very specific topological order.
@@ -81,27 +438,50 @@ class Graph:
 
         Returns:
             A list of vertices in topological order.
+
+        Raises:
+            CycleError: The graph contains a cycle.
         """
-        completed = []
-        parent_count = {vertex: 0 for vertex, _ in self._adj_list.items()}
-        for _, children in self._adj_list.items():
-            for child in children:
-                parent_count[child] += 1
+        if self._specific_order is not None:
+            # Dictionaries keep insertion order, which is the sorted order.
+            return list(self._specific_order)
+        parent_count = self._count_parents()
         available = [
             vertex for vertex, count in parent_count.items() if count == 0
         ]
-        heapq.heapify(available)
-        while available:
-            vertex = heapq.heappop(available)
-            completed.append(vertex)
-            for child in self._adj_list[vertex]:
-                parent_count[child] -= 1
-                if parent_count[child] == 0:
-                    heapq.heappush(available, child)
+        completed = _lexicographic_order(parent_count, available,
+                                         self._adj_list.__getitem__)
+        if len(completed) < len(self._adj_list):
+            raise CycleError(self.find_cycle())
+        self._specific_order = {
+            vertex: position for position, vertex in enumerate(completed)
+        }
         return completed
 
+    @memory.phase('compute')
+    def critical_path(self,
+                      durations: Dict[Any, int]) -> Tuple[List[Any], int]:
+        """Finds the longest chain of dependent steps.
+
+        The length of this chain is the total time it takes to complete all
+        steps with as many workers as needed, which is a lower bound for any
+        number of workers.
+
+        Args:
+            durations: A dictionary that maps each vertex to the amount of time
+                required to complete the corresponding step.
+
+        Returns:
+            The vertices on the critical path in order, and its length.
+
+        Raises:
+            CycleError: The graph contains a cycle.
+        """
+        return _critical_path(self.kahn_topological_sort(),
+                              self._adj_list.__getitem__, durations)
+
     def multiworker_step_sort(self, durations: Dict[Any, int],
-                              workers: int = 5) -> List[Any]:
+                              workers: int = 5) -> Tuple[List[Any], int]:
         """Provides the graph's vertices in a very specific topological order.
 
         See https://adventofcode.com/2018/day/7 Part 2 for details.
@@ -112,49 +492,308 @@ class Graph:
             workers: The number of workers working on the steps.
 
         Returns:
-            A list of vertices in topological-like order.
+            A list of vertices in topological-like order, and the time at which
+            the last step was completed.
+
+        Raises:
+            CycleError: The graph contains a cycle.
         """
-        completed = []
-        parent_count = {vertex: 0 for vertex, _ in self._adj_list.items()}
-        for _, children in self._adj_list.items():
-            for child in children:
-                parent_count[child] += 1
+        parent_count = self._count_parents()
+        available = [
+            vertex for vertex, count in parent_count.items() if count == 0
+        ]
+        completed, time_count = _simulate_workers(parent_count, available,
+                                                  self._adj_list.__getitem__,
+                                                  durations, workers)
+        if len(completed) < len(self._adj_list):
+            raise CycleError(self.find_cycle())
+        return completed, time_count
+
+    def multiworker_schedule(self, durations: Dict[Any, int],
+                             workers: int = 5) -> Dict[Any, StepTiming]:
+        """Simulates when each step is worked on.
+
+        See multiworker_step_sort for details.
+
+        Args:
+            durations: A dictionary that maps each vertex to the amount of time
+                required to complete the corresponding step.
+            workers: The number of workers working on the steps.
+
+        Returns:
+            A dictionary that maps each vertex to the simulated timing of the
+            corresponding step.
+
+        Raises:
+            CycleError: The graph contains a cycle.
+        """
+        parent_count = self._count_parents()
+        available = [
+            vertex for vertex, count in parent_count.items() if count == 0
+        ]
+        schedule = {}
+        _simulate_workers(parent_count, available, self._adj_list.__getitem__,
+                          durations, workers, schedule)
+        if len(schedule) < len(self._adj_list):
+            raise CycleError(self.find_cycle())
+        return schedule
+
+    async def execute(self,
+                      run_step: Callable[[Any], Any],
+                      workers: int = 5) -> Dict[Any, StepTiming]:
+        """Runs the steps with a limited number of concurrent workers.
+
+        Steps are dispatched like in multiworker_step_sort: as soon as a step
+        completes, the steps depending on it become available, and available
+        steps are assigned to idle workers, smallest step first.
+
+        Args:
+            run_step: A function called with a vertex to run the corresponding
+                step. Coroutine functions are awaited, other functions are run
+                in the event loop's default thread pool.
+            workers: The maximum number of steps running at the same time.
+
+        Returns:
+            A dictionary that maps each vertex to the timing of the
+            corresponding step, in seconds since the execution started.
+
+        Raises:
+            CycleError: The graph contains a cycle. No step is run.
+            ValueError: There are no workers. No step is run.
+        """
+        import asyncio  # pylint: disable=C0415
+        if workers < 1:
+            raise ValueError(f'at least one worker is needed, got {workers}')
+        self.topological_sort()
+        loop = asyncio.get_running_loop()
+        parent_count = self._count_parents()
         available = [
             vertex for vertex, count in parent_count.items() if count == 0
         ]
-        progress = [None] * workers
         heapq.heapify(available)
-        time_count = -1  # One extra iteration is required to get started.
-        while len(completed) < len(self._adj_list):
-            time_count += 1
-            for worker, work in enumerate(progress):
-                # Work on in-progress steps for 1 time unit
-                if work is not None:
-                    (step, time_left) = work
-                    time_left -= 1
-
-                    if time_left > 0:
-                        progress[worker] = (step, time_left)
-                        continue
-
-                    completed.append(step)
+        idle_workers = list(range(workers))
+        # Maps running tasks to the worker, step and start time.
+        running: Dict[Awaitable, Tuple[int, Any, float]] = {}
+        timings = {}
+        start_time = loop.time()
+        try:
+            while available or running:
+                while idle_workers and available:
+                    worker = heapq.heappop(idle_workers)
+                    step = heapq.heappop(available)
+                    if asyncio.iscoroutinefunction(run_step):
+                        task = asyncio.ensure_future(run_step(step))
+                    else:
+                        task = loop.run_in_executor(None, run_step, step)
+                    running[task] = (worker, step, loop.time() - start_time)
+
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED)
+                finish = loop.time() - start_time
+                for task in sorted(done, key=lambda task: running[task][0]):
+                    worker, step, start = running.pop(task)
+                    task.result()
+                    timings[step] = StepTiming(worker, start, finish)
+                    heapq.heappush(idle_workers, worker)
                     for child in self._adj_list[step]:
                         parent_count[child] -= 1
                         if parent_count[child] == 0:
                             heapq.heappush(available, child)
-                    progress[worker] = None
+        finally:
+            for task in running:
+                task.cancel()
+        return timings
 
-            for worker, work in enumerate(progress):
-                # Assign steps to free workers
-                if work is None:
-                    if available:
-                        step = heapq.heappop(available)
-                        progress[worker] = (step, durations[step])
-                    continue
 
-        return completed, time_count
+class CompactGraph:
+    """Represents a read-only graph in compressed sparse row format.
 
+    Vertices are interned to integer IDs, in sorted order so that comparing IDs
+    is the same as comparing vertices. The children of all vertices are stored
+    back to back in a single array of IDs, and a second array holds the offset
+    of each vertex's children in the first one.
+
+    Attributes:
+        vertices: A list of the graph's vertices, sorted. The ID of a vertex is
+            its index in this list.
+        offsets: An array where the children of the vertex with ID i are
+            targets[offsets[i]:offsets[i + 1]].
+        targets: An array of the IDs of the children of all vertices.
+        parent_count: An array of the number of parents of each vertex, cached
+            to avoid counting them again for each sort.
+    """
+
+    def __init__(self, vertices: List[Any], offsets: array,
+                 targets: array) -> None:
+        self._vertices = vertices
+        self._offsets = offsets
+        self._targets = targets
+        self._parent_count = array('i', bytes(4 * len(vertices)))
+        for target in targets:
+            self._parent_count[target] += 1
+
+    @classmethod
+    @memory.phase('build')
+    def from_edges(cls,
+                   edges: Iterable[Tuple[Any, Any]],
+                   vertices: Iterable[Any] = ()) -> 'CompactGraph':
+        """Builds a graph from its edges in bulk.
+
+        Duplicate edges are ignored.
+
+        Args:
+            edges: The edges of the graph as (parent, child) pairs.
+            vertices: Vertices of the graph that may not be part of any edge.
 
+        Returns:
+            The corresponding graph.
+        """
+        edges = list(edges)
+        names = set(vertices)
+        names.update(itertools.chain.from_iterable(edges))
+        names = sorted(names)
+        ids = {name: index for index, name in enumerate(names)}
+        # Encoding each edge as a single integer makes removing duplicates and
+        # grouping edges by parent cheap.
+        codes = sorted({ids[parent] * len(names) + ids[child]
+                        for parent, child in edges})
+        offsets = array('i', bytes(4 * (len(names) + 1)))
+        targets = array('i', bytes(4 * len(codes)))
+        for index, code in enumerate(codes):
+            parent, targets[index] = divmod(code, len(names))
+            offsets[parent + 1] += 1
+        for index in range(len(names)):
+            offsets[index + 1] += offsets[index]
+        return cls(names, offsets, targets)
+
+    @property
+    def vertices(self) -> List[Any]:
+        """The graph's vertices, sorted."""
+        return self._vertices
+
+    def _children(self, vertex_id: int) -> array:
+        """Provides the IDs of the children of a vertex.
+
+        Args:
+            vertex_id: The ID of the vertex.
+
+        Returns:
+            An array of the IDs of the vertex's children.
+        """
+        return self._targets[self._offsets[vertex_id]:
+                             self._offsets[vertex_id + 1]]
+
+    def _raise_cycle(self) -> None:
+        """Raises an error describing a cycle in the graph.
+
+        Raises:
+            CycleError: Always, if the graph contains a cycle.
+        """
+        try:
+            _depth_first_order(range(len(self._vertices)), self._children)
+        except CycleError as error:
+            raise CycleError([self._vertices[i] for i in error.cycle]) from None
+
+    @memory.phase('compute')
+    def specific_topological_sort(self) -> List[Any]:
+        """Provides the graph's vertices in a very specific topological order.
+
+        See Graph.specific_topological_sort for details.
+
+        Returns:
+            A list of vertices in topological order.
+
+        Raises:
+            CycleError: The graph contains a cycle.
+        """
+        parent_count = self._parent_count[:]
+        available = [i for i, count in enumerate(parent_count) if count == 0]
+        completed = _lexicographic_order(parent_count, available,
+                                         self._children)
+        if len(completed) < len(self._vertices):
+            self._raise_cycle()
+        return [self._vertices[i] for i in completed]
+
+    @memory.phase('compute')
+    def multiworker_step_sort(self, durations: Dict[Any, int],
+                              workers: int = 5) -> Tuple[List[Any], int]:
+        """Provides the graph's vertices in a very specific topological order.
+
+        See Graph.multiworker_step_sort for details.
+
+        Args:
+            durations: A dictionary that maps each vertex to the amount of time
+                required to complete the corresponding step.
+            workers: The number of workers working on the steps.
+
+        Returns:
+            A list of vertices in topological-like order, and the time at which
+            the last step was completed.
+
+        Raises:
+            CycleError: The graph contains a cycle.
+        """
+        parent_count = self._parent_count[:]
+        available = [i for i, count in enumerate(parent_count) if count == 0]
+        completed, time_count = _simulate_workers(
+            parent_count, available, self._children,
+            [durations[vertex] for vertex in self._vertices], workers)
+        if len(completed) < len(self._vertices):
+            self._raise_cycle()
+        return [self._vertices[i] for i in completed], time_count
+
+    @memory.phase('compute')
+    def critical_path(self,
+                      durations: Dict[Any, int]) -> Tuple[List[Any], int]:
+        """Finds the longest chain of dependent steps.
+
+        See Graph.critical_path for details. Vertices are visited in the order
+        of specific_topological_sort.
+
+        Args:
+            durations: A dictionary that maps each vertex to the amount of time
+                required to complete the corresponding step.
+
+        Returns:
+            The vertices on the critical path in order, and its length.
+
+        Raises:
+            CycleError: The graph contains a cycle.
+        """
+        parent_count = self._parent_count[:]
+        available = [i for i, count in enumerate(parent_count) if count == 0]
+        order = _lexicographic_order(parent_count, available, self._children)
+        if len(order) < len(self._vertices):
+            self._raise_cycle()
+        path, makespan = _critical_path(
+            order, self._children,
+            [durations[vertex] for vertex in self._vertices])
+        return [self._vertices[i] for i in path], makespan
+
+
+def compare_schedules(
+        real: Dict[Any, StepTiming],
+        simulated: Dict[Any, StepTiming],
+        time_unit: float = 1.0) -> List[Tuple[Any, float, float]]:
+    """Compares the real timings of steps with their simulated timings.
+
+    Args:
+        real: The timings recorded by Graph.execute, in seconds.
+        simulated: The timings computed by Graph.multiworker_schedule.
+        time_unit: The number of seconds in one unit of simulated time.
+
+    Returns:
+        A list of tuples, in the order in which steps really started, of the
+        step, how much later it really started than simulated, and how much
+        later it really finished than simulated, in seconds.
+    """
+    return [(step, timing.start - simulated[step].start * time_unit,
+             timing.finish - simulated[step].finish * time_unit)
+            for step, timing in sorted(real.items(),
+                                       key=lambda item: item[1].start)]
+
+
+@memory.phase('parse')
 def _read_dependencies(input_string: str) -> List[Tuple[str, str]]:
     """Reads step dependencies from a given input string.
 
@@ -167,11 +806,46 @@ def _read_dependencies(input_string: str) -> List[Tuple[str, str]]:
     """
     dependencies = []
     for line in input_string.split('\n'):
-        words = line.split()
-        dependencies.append((words[1], words[7]))
+        if not line.strip():
+            continue
+        match = _DEPENDENCY_PATTERN.match(line.strip())
+        if match is None:
+            raise ValueError(f'invalid dependency: {line!r}')
+        dependencies.append(match.groups())
     return dependencies
 
 
+def _read_durations(lines: Iterable[str]) -> Dict[str, int]:
+    """Reads step durations, one step per line.
+
+    Each line contains a step name followed by its duration, separated by
+    whitespace. Durations are whole numbers of seconds written with the digits
+    0 to 9, so negative durations are rejected. Blank lines are ignored. Passing an open file reads it one line
+    at a time instead of loading it all in memory.
+
+    Args:
+        lines: The lines to read, for example an open file or the result of
+            str.splitlines.
+
+    Returns:
+        A dictionary that maps each step name to its duration.
+
+    Raises:
+        ValueError: A line does not contain a step name and a valid
+            duration.
+    """
+    durations = {}
+    for line in lines:
+        fields = line.rsplit(None, 1)
+        if not fields:
+            continue
+        if len(fields) != 2 or not _DURATION_PATTERN.fullmatch(fields[1]):
+            raise ValueError(f'invalid duration: {line!r}')
+        durations[fields[0]] = int(fields[1])
+    return durations
+
+
+@memory.phase('build')
 def _build_dependency_graph(dependencies: List[Tuple[str, str]]) -> Graph:
     """Builds a directed acyclic graph from a list of dependencies.
 
@@ -193,43 +867,222 @@ def _get_step_durations(  # pylint: disable=W0102
     return {step: offset + i for i, step in enumerate(steps)}
 
 
-def get_step_order(input_string: str) -> str:
+def _get_durations(steps: Iterable[str], offset: int,
+                   durations: Optional[Iterable[str]]) -> Dict[str, int]:
+    """Provides the duration of each step.
+
+    Args:
+        steps: The steps that need a duration.
+        offset: The offset in seconds of the step durations, if steps are named
+            A to Z.
+        durations: The lines of a durations file, or None to use offset.
+
+    Returns:
+        A dictionary that maps each step name to its duration.
+
+    Raises:
+        ValueError: Some steps do not have a duration.
+    """
+    if durations is None:
+        step_durations = _get_step_durations(offset=offset)
+    else:
+        step_durations = _read_durations(durations)
+    missing_steps = set(steps) - step_durations.keys()
+    if missing_steps:
+        raise ValueError(f'missing durations: {sorted(missing_steps)}')
+    return step_durations
+
+
+def _get_total_time(graph: CompactGraph, durations: Dict[str, int],
+                    workers: int) -> int:
+    """Simulates workers completing all steps of a graph.
+
+    Args:
+        graph: The graph of steps.
+        durations: A dictionary that maps each step to its duration.
+        workers: The number of workers working on the steps in parallel.
+
+    Returns:
+        The total time required in seconds.
+    """
+    _, total_time = graph.multiworker_step_sort(durations, workers)
+    return total_time
+
+
+@cache.cached()
+@memory.measured
+def get_step_order(input_string: str, separator: str = '') -> str:
     """Finds the order the instructions should be completed in.
 
     Args:
         input_string: The puzzle input.
+        separator: The string to write between step names.
 
     Returns:
         A string with the step names written in order.
     """
     dependencies = _read_dependencies(input_string)
-    graph = _build_dependency_graph(dependencies)
-    return "".join(graph.specific_topological_sort())
+    graph = CompactGraph.from_edges(dependencies)
+    return separator.join(graph.specific_topological_sort())
 
 
+@cache.cached()
+@memory.measured
 def get_multiworker_total_time(input_string: str,
                                offset: int = 61,
-                               workers: int = 5) -> str:
+                               workers: int = 5,
+                               durations: Iterable[str] = None) -> int:
     """Finds the total time required by multiple workers to complete all steps.
 
     Args:
         input_string: The puzzle input.
         offset: The offset in seconds of the step durations. Step A will take
-            offset seconds, step B offset+1, etc.
+            offset seconds, step B offset+1, etc. Ignored if durations is
+            given.
         workers: The number of workers working on the steps in parallel.
+        durations: The lines of a durations file, where each line contains a
+            step name followed by its duration in seconds. If None, steps must
+            be named A to Z and durations depend on offset.
 
     Returns:
         An integer representing the total time required in seconds.
     """
     dependencies = _read_dependencies(input_string)
-    graph = _build_dependency_graph(dependencies)
-    step_durations = _get_step_durations(offset=offset)
-    _, total_time = graph.multiworker_step_sort(step_durations, workers)
-    return total_time
+    graph = CompactGraph.from_edges(dependencies)
+    step_durations = _get_durations(graph.vertices, offset, durations)
+    return _get_total_time(graph, step_durations, workers)
+
+
+@cache.cached()
+@memory.measured
+def solve(input_string: str,
+          offset: int = 61,
+          workers: int = 5) -> Tuple[str, int]:
+    """Solves both parts of the day's puzzle, building the graph once.
+
+    Args:
+        input_string: The puzzle input.
+        offset: The offset in seconds of the step durations.
+        workers: The number of workers working on the steps in parallel.
+
+    Returns:
+        The step names written in order and the total time required by the
+        workers to complete all steps.
+    """
+    graph = CompactGraph.from_edges(_read_dependencies(input_string))
+    step_durations = _get_durations(graph.vertices, offset, None)
+    return (''.join(graph.specific_topological_sort()),
+            _get_total_time(graph, step_durations, workers))
+
+
+def solve_batch(inputs: Iterable[batch.Input],
+                offset: int = 61,
+                steps_workers: int = 5,
+                pool: Optional[str] = 'process',
+                workers: Optional[int] = None) -> Iterator[Tuple[str, int]]:
+    """Solves both parts of the day's puzzle for many inputs.
+
+    See batch.solve_batch for details.
+
+    Args:
+        inputs: The puzzle inputs, or paths to them.
+        offset: The offset in seconds of the step durations.
+        steps_workers: The number of workers working on the steps in parallel,
+            not to be confused with the workers of the pool.
+        pool: The kind of pool the inputs are solved in.
+        workers: The number of workers in the pool.
+
+    Yields:
+        The answers to both parts of the puzzle for each input, in order.
+    """
+    solve_input = functools.partial(solve,
+                                    offset=offset,
+                                    workers=steps_workers)
+    return batch.solve_batch(solve_input, inputs, pool, workers)
+
+
+@cache.cached()
+@memory.measured
+def get_critical_path(input_string: str,
+                      offset: int = 61,
+                      durations: Iterable[str] = None) -> Tuple[List[str], int]:
+    """Finds the chain of steps that limits how fast all steps can complete.
+
+    Args:
+        input_string: The puzzle input.
+        offset: The offset in seconds of the step durations. Step A will take
+            offset seconds, step B offset+1, etc. Ignored if durations is
+            given.
+        durations: The lines of a durations file, where each line contains a
+            step name followed by its duration in seconds.
+
+    Returns:
+        The names of the steps on the critical path in order, and the total
+        time required in seconds with an unlimited number of workers.
+    """
+    graph = CompactGraph.from_edges(_read_dependencies(input_string))
+    step_durations = _get_durations(graph.vertices, offset, durations)
+    return graph.critical_path(step_durations)
+
+
+@cache.cached(ignore=['processes'])
+@memory.measured
+def get_worker_sweep(input_string: str,
+                     max_workers: int,
+                     offset: int = 61,
+                     durations: Iterable[str] = None,
+                     processes: int = None) -> List[Tuple[int, int, int]]:
+    """Finds the total time required for each number of workers.
+
+    The simulations for each number of workers run in parallel processes.
+
+    Args:
+        input_string: The puzzle input.
+        max_workers: The largest number of workers to simulate.
+        offset: The offset in seconds of the step durations. Step A will take
+            offset seconds, step B offset+1, etc. Ignored if durations is
+            given.
+        durations: The lines of a durations file, where each line contains a
+            step name followed by its duration in seconds.
+        processes: The number of processes running simulations. Defaults to
+            the number of processors on the machine.
+
+    Returns:
+        A list with, for each number of workers from 1 to max_workers, a tuple
+        of the number of workers, a lower bound of the total time, and the
+        simulated total time. The lower bound is the longest of the critical
+        path and of the total work shared evenly between the workers.
+    """
+    graph = CompactGraph.from_edges(_read_dependencies(input_string))
+    step_durations = _get_durations(graph.vertices, offset, durations)
+    _, critical_time = graph.critical_path(step_durations)
+    total_work = sum(max(step_durations[step], 1) for step in graph.vertices)
+    worker_counts = range(1, max_workers + 1)
+    get_total_time = functools.partial(_get_total_time, graph, step_durations)
+    import concurrent.futures  # pylint: disable=C0415
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        total_times = list(executor.map(get_total_time, worker_counts))
+    return [(workers, max(critical_time, -(-total_work // workers)), time)
+            for workers, time in zip(worker_counts, total_times)]
 
 
 def _run_tests() -> None:
     """Tests solution."""
+    import asyncio  # pylint: disable=C0415
+    assert list(
+        solve_batch([
+            'Step C must be finished before step A can begin.\n'
+            'Step C must be finished before step F can begin.\n'
+            'Step A must be finished before step B can begin.\n'
+            'Step A must be finished before step D can begin.\n'
+            'Step B must be finished before step E can begin.\n'
+            'Step D must be finished before step E can begin.\n'
+            'Step F must be finished before step E can begin.',
+            'Step B must be finished before step A can begin.'
+        ],
+                    offset=1,
+                    steps_workers=2,
+                    pool='thread')) == [('CABDFE', 15), ('BA', 3)]
     assert get_step_order(
         'Step C must be finished before step A can begin.\n'
         'Step C must be finished before step F can begin.\n'
@@ -248,9 +1101,117 @@ def _run_tests() -> None:
         'Step F must be finished before step E can begin.',
         offset=1,
         workers=2) == 15
+    assert get_multiworker_total_time(
+        'Step C must be finished before step A can begin.\n'
+        'Step C must be finished before step F can begin.\n'
+        'Step A must be finished before step B can begin.\n'
+        'Step A must be finished before step D can begin.\n'
+        'Step B must be finished before step E can begin.\n'
+        'Step D must be finished before step E can begin.\n'
+        'Step F must be finished before step E can begin.',
+        offset=10**9,
+        workers=2) == 4 * 10**9 + 14
+    graph = _build_dependency_graph([(i, i + 1) for i in range(10000)])
+    assert graph.topological_sort() == list(range(10001))
+    assert graph.kahn_topological_sort() == list(range(10001))
+    graph.add_edge(0, 1)
+    assert graph.specific_topological_sort() == list(range(10001))
+    graph.add_edge(10000, 9998)
+    assert graph.find_cycle() == [9998, 9999, 10000, 9998]
+    assert get_step_order(
+        'Step compile must be finished before step link can begin.\n'
+        'Step fetch must be finished before step compile can begin.\n'
+        'Step fetch must be finished before step docs can begin.',
+        separator=' ') == 'fetch compile docs link'
+    assert get_multiworker_total_time(
+        'Step compile must be finished before step link can begin.\n'
+        'Step fetch must be finished before step compile can begin.\n'
+        'Step fetch must be finished before step docs can begin.',
+        workers=2,
+        durations='compile 10\ndocs 30\n\nfetch 5\nlink 2'.splitlines()) == 35
+    assert get_critical_path(
+        'Step C must be finished before step A can begin.\n'
+        'Step C must be finished before step F can begin.\n'
+        'Step A must be finished before step B can begin.\n'
+        'Step A must be finished before step D can begin.\n'
+        'Step B must be finished before step E can begin.\n'
+        'Step D must be finished before step E can begin.\n'
+        'Step F must be finished before step E can begin.',
+        offset=1) == (['C', 'F', 'E'], 14)
+    assert get_worker_sweep(
+        'Step C must be finished before step A can begin.\n'
+        'Step C must be finished before step F can begin.\n'
+        'Step A must be finished before step B can begin.\n'
+        'Step A must be finished before step D can begin.\n'
+        'Step B must be finished before step E can begin.\n'
+        'Step D must be finished before step E can begin.\n'
+        'Step F must be finished before step E can begin.',
+        max_workers=3,
+        offset=1) == [(1, 21, 21), (2, 14, 15), (3, 14, 14)]
+    graph = _build_dependency_graph(
+        _read_dependencies('Step C must be finished before step A can begin.\n'
+                           'Step C must be finished before step F can begin.\n'
+                           'Step A must be finished before step B can begin.\n'
+                           'Step A must be finished before step D can begin.\n'
+                           'Step B must be finished before step E can begin.\n'
+                           'Step D must be finished before step E can begin.\n'
+                           'Step F must be finished before step E can begin.'))
+    durations = _get_step_durations(offset=1)
+
+    async def run_step(step):
+        await asyncio.sleep(durations[step] / 1000)
+
+    real = asyncio.run(graph.execute(run_step, workers=1))
+    simulated = graph.multiworker_schedule(durations, workers=1)
+    assert [step for step, _, _ in compare_schedules(real, simulated)
+           ] == list('CABDFE')
+    assert [timing.finish for timing in simulated.values()
+           ] == [3, 4, 6, 10, 16, 21]
+    real = asyncio.run(graph.execute(durations.get, workers=2))
+    assert all(real[parent].finish <= real[child].start
+               for parent, child in _read_dependencies(
+                   'Step C must be finished before step A can begin.\n'
+                   'Step F must be finished before step E can begin.'))
+    graph = _build_dependency_graph([('B', 'C')])
+    graph.add_edge('C', 'A')
+    assert graph.topological_sort() == ['B', 'C', 'A']
+    assert graph.specific_topological_sort() == ['B', 'C', 'A']
+    graph.remove_edge('C', 'A')
+    assert graph.specific_topological_sort() == ['A', 'B', 'C']
+    graph.add_edge('A', 'B')
+    assert graph.specific_topological_sort() == ['A', 'B', 'C']
+    graph.add_edge('C', 'A')
+    assert graph.find_cycle() == ['B', 'C', 'A', 'B']
+    graph.remove_edge('A', 'B')
+    assert graph.topological_sort() == ['B', 'C', 'A']
+    graph = CompactGraph.from_edges([(2, 1), (1, 0), (2, 1), (0, 2)], [3])
+    try:
+        graph.specific_topological_sort()
+        assert False
+    except CycleError as error:
+        assert error.cycle == [0, 2, 1, 0]
+    try:
+        graph.critical_path(dict.fromkeys(range(4), 1))
+        assert False
+    except CycleError as error:
+        assert error.cycle == [0, 2, 1, 0]
+    try:
+        get_multiworker_total_time('Step A must be finished before step B can '
+                                   'begin.',
+                                   workers=0)
+        assert False
+    except ValueError as error:
+        assert not isinstance(error, CycleError)
+    for line in ['compile', 'compile ten', 'compile -3', 'compile --5',
+                 'compile \u00b2']:
+        try:
+            _read_durations(['fetch 5', line])
+            assert False
+        except ValueError as error:
+            assert str(error) == f'invalid duration: {line!r}'
 
 
-def _print_answers(step_order: str, multiworker_total_time: str) -> None:
+def _print_answers(step_order: str, multiworker_total_time: int) -> None:
     """Prints answers.
 
     Args:
@@ -264,11 +1225,8 @@ def _print_answers(step_order: str, multiworker_total_time: str) -> None:
 
 
 def main() -> None:
-    """Runs tests and prints answers to day's puzzle."""
-    _run_tests()
-    input_string = utils.read_input(7)
-    step_order = get_step_order(input_string)
-    multiworker_total_time = get_multiworker_total_time(input_string)
+    """Prints answers to day's puzzle."""
+    step_order, multiworker_total_time = solve(utils.read_input(7))
     _print_answers(step_order, multiworker_total_time)
 
 
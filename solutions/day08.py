@@ -2,29 +2,58 @@
 
 Reading input:
     The input is a series of integers spearated by spaces. Using Python's
-    string.split and int functions we can build a list of integers. See
-    _read_numbers function.
+    string.split and int functions we could build a list of integers, but that
+    creates a string and an integer object per number. With the NumPy backend,
+    we parse the whole input in a single call into an array of 32-bit integers,
+    which we then convert to a Python array. Reading an element of a Python
+    array is much faster than reading one from a NumPy array, and both store
+    integers compactly. See _read_numbers_python and _read_numbers_numpy
+    functions and the backends module.
 
 Representing nodes:
     To represent the nodes of our tree, we can define a simple class. This class
     will conveniently store a node's header, children, and metadata. The node's
-    children are represented as a list of other instances of our class. See Node
+    children are represented as a list of other instances of our class. Rather
+    than copying its header and metadata out of the numbers, a node keeps a
+    reference to the numbers and the positions of its header and metadata.
+    Nodes use __slots__ to avoid carrying a dictionary each. See Node class.
+
+Compact trees:
+    With millions of nodes, even slotted objects are costly. A more compact
+    representation stores the tree as four parallel arrays of integers, with one
+    entry per node: its number of children, its number of metadata entries, the
+    identifier of its first child, and the index of its first metadata entry in
+    the numbers. When we read the header of a node, we reserve consecutive
+    identifiers for all its children, so that the children of a node are
+    identified by a range of integers. Identifiers are reserved up front
+    since a tree of n numbers contains at most n / 2 nodes. See CompactTree
     class.
 
+    Children always have larger identifiers than their parent. Computing the
+    values of the nodes in decreasing order of identifier therefore computes the
+    value of each node after the values of all its children, in a single pass
+    without recursion. See CompactTree.node_values method.
+
 Building a node from numbers:
     We need to read the numbers provided as input and build the corresponding
     tree of nodes. The first node will start at the beginning of our list of
     numbers, but to build that node's children we will need to read from where
-    we left off. A recursive function is great for this. See Node.load method.
+    we left off. A recursive function would do, but deep trees would exceed
+    Python's recursion limit. Instead, we keep a stack of the nodes whose
+    children we are still reading: we start a new child while the node on top
+    of the stack is missing some, and otherwise read its metadata and pop it.
+    See Node.load method.
 
 Building the tree:
     Building the tree is only a question of building the root node of our tree.
-    All the other nodes in the tree will be built by our recursive build method.
-    See _build_tree function.
+    All the other nodes in the tree will be built by the root's load method,
+    which reads them from its stack rather than recursively. See _build_tree
+    function.
 
 Summing metadata:
-    We can sum all the metadata values in our tree with a simple recursive
-    function. See _sum_metadata function.
+    We can sum all the metadata values in our tree by visiting every node, using
+    a stack of nodes left to visit instead of recursion. See _sum_metadata
+    function.
 
 Part 1:
     All we need to do to solve the first part of the day's puzzle is to read
@@ -34,77 +63,344 @@ Part 1:
 A node's value:
     If a node has no children, its value can be computed with Python's sum
     function. If it has children, we can sum the value of each of the child
-    nodes that match the parent node's metadata. A simple recursive approach
-    works well here. See _get_node_value function.
+    nodes that match the parent node's metadata. Metadata can reference the
+    same child many times, so evaluating a child once per reference would take
+    time exponential in the depth of the tree. Instead, we compute the value of
+    each referenced node exactly once, after the values of its children, and
+    store it. Again, a stack of nodes to evaluate replaces recursion. See
+    _get_node_value function.
 
 Part 2:
     To solve the second part of the puzzle, we need to read the numbers in our
     input, build the corresponding tree, and compute the value of the root node.
     See get_root_value function.
+
+Streaming:
+    Both answers can be computed without building the tree at all. Numbers are
+    read lazily from chunks of the input, and we keep a stack with, for each
+    node being read, its header and the values of its children read so far.
+    When all of a node's children have been read, we read its metadata, add it
+    to the metadata sum, compute the node's value from its children's values,
+    and pass that value on to its parent. Memory is bounded by the depth of the
+    tree and the number of children of nodes along the current path, not by
+    the number of nodes. See _stream_numbers and get_sum_and_value functions.
+
+Wide trees:
+    Once we know where each child of the root starts, the subtrees of the
+    children can be evaluated independently. Finding where a subtree ends only
+    requires reading headers and skipping over metadata, with a stack of the
+    number of children left to skip at each level. See _skip_subtree function.
+
+    The numbers are written to a temporary file that each process of a pool
+    maps into memory, so that the subtrees are evaluated in parallel without
+    copying the numbers to every process. The metadata sum and value of the
+    root are then combined from those of its children. See
+    get_parallel_sum_and_value function.
 """
 
-from typing import List
+import os
+from array import array
+from typing import (Dict, Iterable, Iterator, List, Optional, Sequence,
+                    Tuple, Union)
 
-import utils
+from . import backends, batch, cache, memory, utils
 
 
-class Node:  # pylint: disable=R0903
+class Node:
     """Represents a node of a tree.
 
     Attributes:
-        header: A pair of numbers representing the quantity of child nodes and
-            the quantity of metadata entries.
+        numbers: The sequence of numbers the node was loaded from.
+        start: The index of the node's header in numbers.
+        metadata_start: The index of the node's first metadata entry in numbers.
         children: A list of child nodes.
-        metadata: A list of metadata entries represented as numbers.
     """
 
+    __slots__ = ('numbers', 'start', 'metadata_start', 'children')
+
     def __init__(self) -> None:
-        self.header = [0, 0]
+        self.numbers = [0, 0]
+        self.start = 0
+        self.metadata_start = 2
         self.children = []
-        self.metadata = []
 
-    def load(self, numbers: List[int], start_index: int = 0) -> int:
-        """Loads a node from the given list of numbers.
+    @property
+    def header(self) -> Tuple[int, int]:
+        """The quantity of child nodes and the quantity of metadata entries."""
+        return self.numbers[self.start], self.numbers[self.start + 1]
+
+    @property
+    def metadata_indices(self) -> range:
+        """The indices of the node's metadata entries in numbers."""
+        return range(self.metadata_start,
+                     self.metadata_start + self.numbers[self.start + 1])
+
+    @property
+    def metadata(self) -> List[int]:
+        """A list of metadata entries represented as numbers."""
+        return [self.numbers[index] for index in self.metadata_indices]
+
+    def _reset(self, numbers: Sequence[int], start: int) -> None:
+        """Points the node at the header starting at a given index."""
+        self.numbers = numbers
+        self.start = start
+        self.children = []
+
+    def load(self, numbers: Sequence[int], start_index: int = 0) -> int:
+        """Loads a node from the given sequence of numbers.
 
         Initialises the node based on the numbers starting at start_index. If
         the node contains other nodes, it will load them as well.
 
         Args:
-            numbers: A list of numbers representing a node tree.
+            numbers: A sequence of numbers representing a node tree.
             start_index: The index of the first number representing the node.
 
         Returns:
             The start index of the next node.
         """
-        index = start_index
-        self.header = numbers[index:index + 2]
-        index += 2
-        for _ in range(self.header[0]):
-            child = Node()
-            index = child.load(numbers, index)
-            self.children.append(child)
-        self.metadata = numbers[index:index + self.header[1]]
-        index += self.header[1]
+        self._reset(numbers, start_index)
+        index = start_index + 2
+        stack = [self]
+        while stack:
+            node = stack[-1]
+            if len(node.children) < numbers[node.start]:
+                child = Node()
+                child._reset(numbers, index)  # pylint: disable=W0212
+                node.children.append(child)
+                stack.append(child)
+                index += 2
+            else:
+                node.metadata_start = index
+                index += numbers[node.start + 1]
+                stack.pop()
         return index
 
 
-def _read_numbers(input_string: str) -> List[int]:
+class CompactTree:
+    """Represents a tree of nodes as parallel arrays.
+
+    Nodes are identified by integers, the root node being 0. The children of a
+    node are identified by consecutive integers, all larger than the node's.
+
+    Attributes:
+        numbers: The sequence of numbers the tree was loaded from.
+        child_counts: The quantity of child nodes of each node.
+        metadata_counts: The quantity of metadata entries of each node.
+        first_children: The identifier of the first child of each node.
+        metadata_starts: The index of the first metadata entry of each node in
+            numbers.
+    """
+
+    def __init__(self, numbers: Sequence[int], child_counts: array,
+                 metadata_counts: array, first_children: array,
+                 metadata_starts: array) -> None:
+        self.numbers = numbers
+        self.child_counts = child_counts
+        self.metadata_counts = metadata_counts
+        self.first_children = first_children
+        self.metadata_starts = metadata_starts
+
+    @classmethod
+    @memory.phase('build')
+    def load(cls,
+             numbers: Sequence[int],
+             start_index: int = 0) -> 'CompactTree':
+        """Loads a tree from the given sequence of numbers.
+
+        Args:
+            numbers: A sequence of numbers representing a node tree.
+            start_index: The index of the first number representing the root.
+
+        Returns:
+            The tree whose root node starts at start_index.
+        """
+        capacity = (len(numbers) - start_index) // 2
+        child_counts, metadata_counts, first_children, metadata_starts = (
+            array('i', bytes(4 * capacity)) for _ in range(4))
+        child_counts[0] = numbers[start_index]
+        metadata_counts[0] = numbers[start_index + 1]
+        first_children[0] = 1
+        node_count = 1 + child_counts[0]
+        index = start_index + 2
+        # Each entry holds a node and the quantity of its children read so far.
+        stack = [[0, 0]]
+        while stack:
+            entry = stack[-1]
+            node, read = entry
+            if read < child_counts[node]:
+                entry[1] += 1
+                child = first_children[node] + read
+                child_counts[child] = numbers[index]
+                metadata_counts[child] = numbers[index + 1]
+                first_children[child] = node_count
+                node_count += numbers[index]
+                index += 2
+                stack.append([child, 0])
+            else:
+                metadata_starts[node] = index
+                index += metadata_counts[node]
+                stack.pop()
+        for column in (child_counts, metadata_counts, first_children,
+                       metadata_starts):
+            del column[node_count:]
+        return cls(numbers, child_counts, metadata_counts, first_children,
+                   metadata_starts)
+
+    def __len__(self) -> int:
+        return len(self.child_counts)
+
+    def metadata(self, node: int) -> List[int]:
+        """Returns the metadata entries of a node."""
+        start = self.metadata_starts[node]
+        return list(self.numbers[start:start + self.metadata_counts[node]])
+
+    @memory.phase('compute')
+    def metadata_sum(self) -> int:
+        """Sums the metadata values of all nodes in the tree."""
+        numbers = self.numbers
+        return sum(
+            sum(numbers[start:start + count])
+            for start, count in zip(self.metadata_starts, self.metadata_counts))
+
+    @memory.phase('compute')
+    def node_values(self) -> List[int]:
+        """Computes the value of every node in the tree.
+
+        Values are kept in a list rather than an array since they can grow
+        exponentially with the depth of the tree.
+
+        Returns:
+            A list of the value of each node, indexed by identifier.
+        """
+        values = [0] * len(self)
+        for node in reversed(range(len(self))):
+            metadata = self.metadata(node)
+            child_count = self.child_counts[node]
+            if not child_count:
+                values[node] = sum(metadata)
+            else:
+                first_child = self.first_children[node] - 1
+                values[node] = sum(values[first_child + index]
+                                   for index in metadata
+                                   if 0 < index <= child_count)
+        return values
+
+
+def _read_numbers_python(input_string: str) -> array:
+    """Reads numbers from a given input string.
+
+    Args:
+        input_string: A string containing the day's input.
+
+    Returns:
+        An array of numbers.
+    """
+    return array('i', map(int, input_string.split()))
+
+
+def _read_numbers_numpy(input_string: str) -> array:
     """Reads numbers from a given input string.
 
     Args:
         input_string: A string containing the day's input.
 
     Returns:
-        A list of numbers.
+        An array of numbers.
+
+    Raises:
+        OverflowError: A number does not fit in the array, as with the Python
+            backend.
     """
-    return [int(n) for n in input_string.split()]
+    np = utils.get_numpy()
+    # Numbers are parsed as 64-bit integers and checked, since parsing them as
+    # 32-bit integers would silently wrap those that do not fit.
+    parsed = np.fromstring(input_string, dtype=np.int64, sep=' ')
+    limits = np.iinfo(np.int32)
+    if parsed.size and parsed.max() > limits.max:
+        raise OverflowError('signed integer is greater than maximum')
+    if parsed.size and parsed.min() < limits.min:
+        raise OverflowError('signed integer is less than minimum')
+    numbers = array('i')
+    numbers.frombytes(parsed.astype(np.int32).tobytes())
+    return numbers
+
+
+_READ_NUMBERS_BACKENDS = {
+    backends.PYTHON: _read_numbers_python,
+    backends.NUMPY: _read_numbers_numpy,
+}
+
+
+@memory.phase('parse')
+def _read_numbers(input_string: str) -> array:
+    """Reads numbers from a given input string with the current backend.
 
+    Args:
+        input_string: A string containing the day's input.
 
-def _build_tree(numbers: List[int]) -> Node:
-    """Builds a tree of nodes from a given list of numbers.
+    Returns:
+        An array of numbers.
+    """
+    return backends.select(_READ_NUMBERS_BACKENDS)(input_string)
+
+
+def _stream_numbers(chunks: Iterable[Union[str, bytes]]) -> Iterator[int]:
+    """Reads numbers lazily from consecutive chunks of an input.
+
+    Args:
+        chunks: The puzzle input, split in consecutive chunks. A number may be
+            split across chunks.
+
+    Yields:
+        The numbers in the input.
+    """
+    partial = b''
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        words = (partial + chunk).split()
+        if not words:
+            partial = b''
+            continue
+        partial = b'' if chunk[-1:].isspace() else words.pop()
+        yield from map(int, words)
+    if partial:
+        yield int(partial)
+
+
+def _skip_subtree(numbers: Sequence[int], start_index: int) -> int:
+    """Finds where a node ends without building it.
 
     Args:
-        numbers: A list of numbers representing an encoded node tree.
+        numbers: A sequence of numbers representing a node tree.
+        start_index: The index of the first number representing the node.
+
+    Returns:
+        The start index of the next node.
+    """
+    index = start_index + 2
+    # Each entry holds the quantity of children left to skip and the quantity
+    # of metadata entries of a node.
+    stack = [[numbers[start_index], numbers[start_index + 1]]]
+    while stack:
+        entry = stack[-1]
+        if entry[0]:
+            entry[0] -= 1
+            stack.append([numbers[index], numbers[index + 1]])
+            index += 2
+        else:
+            index += entry[1]
+            stack.pop()
+    return index
+
+
+@memory.phase('build')
+def _build_tree(numbers: Sequence[int]) -> Node:
+    """Builds a tree of nodes from a given sequence of numbers.
+
+    Args:
+        numbers: A sequence of numbers representing an encoded node tree.
 
     Returns:
         The parent node of the tree (contains all other nodes).
@@ -114,6 +410,7 @@ def _build_tree(numbers: List[int]) -> Node:
     return tree
 
 
+@memory.phase('compute')
 def _sum_metadata(tree: Node) -> int:
     """Sums the metadata values of all nodes in the tree.
 
@@ -123,62 +420,302 @@ def _sum_metadata(tree: Node) -> int:
     Returns:
         The sum of all metadata in the tree.
     """
-    return sum(tree.metadata) + sum(
-        [_sum_metadata(child) for child in tree.children])
+    numbers = tree.numbers
+    metadata_sum = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        metadata_sum += sum(map(numbers.__getitem__, node.metadata_indices))
+        stack.extend(node.children)
+    return metadata_sum
 
 
+@memory.phase('compute')
 def _get_node_value(node: Node) -> int:
-    """Sums the values of all nodes in the tree.
+    """Computes the value of a node.
 
     Args:
         node: The parent node of the tree.
 
     Returns:
-        The sum of all node values in the tree.
+        The value of the node.
     """
-    if not node.children:
-        return sum(node.metadata)
-    return sum([
-        _get_node_value(node.children[index - 1])
-        for index in node.metadata
-        if 0 <= index - 1 < len(node.children)
-    ])
-
-
-def get_metadata_sum(input_string: str) -> int:
+    numbers = node.numbers
+    values: Dict[Node, int] = {}
+    # Each entry holds a node and whether its children have been evaluated.
+    stack = [(node, False)]
+    while stack:
+        current, expanded = stack.pop()
+        if current in values:
+            continue
+        metadata = [numbers[index] for index in current.metadata_indices]
+        children = [
+            current.children[index - 1]
+            for index in metadata
+            if 0 <= index - 1 < len(current.children)
+        ]
+        if not current.children:
+            values[current] = sum(metadata)
+        elif expanded:
+            values[current] = sum(values[child] for child in children)
+        else:
+            stack.append((current, True))
+            stack.extend((child, False)
+                         for child in children
+                         if child not in values)
+    return values[node]
+
+
+@cache.cached(ignore=['compact'])
+@memory.measured
+def get_metadata_sum(input_string: str, compact: bool = True) -> int:
     """Computes the sum of all metadata in all nodes.
 
     Args:
         input_string: The puzzle input.
+        compact: Whether to represent the tree as a CompactTree rather than as
+            Node objects.
 
     Returns:
         An integer representing the sum of all metadata in the node tree.
     """
     numbers = _read_numbers(input_string)
+    if compact:
+        return CompactTree.load(numbers).metadata_sum()
     tree = _build_tree(numbers)
     metadata_sum = _sum_metadata(tree)
     return metadata_sum
 
 
-def get_root_value(input_string: str) -> int:
+@cache.cached(ignore=['compact'])
+@memory.measured
+def get_root_value(input_string: str, compact: bool = True) -> int:
     """Computes the value of the root node.
 
     Args:
         input_string: The puzzle input.
+        compact: Whether to represent the tree as a CompactTree rather than as
+            Node objects.
 
     Returns:
         An integer representing the value of the root node.
     """
     numbers = _read_numbers(input_string)
+    if compact:
+        return CompactTree.load(numbers).node_values()[0]
     tree = _build_tree(numbers)
     root_value = _get_node_value(tree)
     return root_value
 
 
+@cache.cached()
+@memory.measured
+def solve(input_string: str) -> Tuple[int, int]:
+    """Solves both parts of the day's puzzle, building the tree once.
+
+    Args:
+        input_string: The puzzle input.
+
+    Returns:
+        A pair of integers representing the sum of all metadata in the node
+        tree and the value of the root node.
+    """
+    tree = CompactTree.load(_read_numbers(input_string))
+    return tree.metadata_sum(), tree.node_values()[0]
+
+
+def solve_batch(inputs: Iterable[batch.Input],
+                pool: Optional[str] = 'process',
+                workers: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """Solves both parts of the day's puzzle for many inputs.
+
+    See batch.solve_batch for details.
+
+    Args:
+        inputs: The puzzle inputs, or paths to them.
+        pool: The kind of pool the inputs are solved in.
+        workers: The number of workers in the pool.
+
+    Yields:
+        The answers to both parts of the puzzle for each input, in order.
+    """
+    return batch.solve_batch(solve, inputs, pool, workers)
+
+
+@memory.measured
+def get_sum_and_value(chunks: Iterable[Union[str, bytes]]) -> Tuple[int, int]:
+    """Computes the metadata sum and root value in a single streaming pass.
+
+    Args:
+        chunks: The puzzle input, split in consecutive chunks.
+
+    Returns:
+        A pair of integers representing the sum of all metadata in the node
+        tree and the value of the root node.
+
+    Raises:
+        ValueError: The input ends before the root node does.
+    """
+    numbers = _stream_numbers(chunks)
+    metadata_sum = 0
+    # Each entry holds the header of a node and the values of its children.
+    stack: List[Tuple[int, int, List[int]]] = []
+    try:
+        while True:
+            if not stack or len(stack[-1][2]) < stack[-1][0]:
+                stack.append((next(numbers), next(numbers), []))
+                continue
+            child_count, metadata_count, child_values = stack.pop()
+            metadata = [next(numbers) for _ in range(metadata_count)]
+            metadata_sum += sum(metadata)
+            if not child_count:
+                value = sum(metadata)
+            else:
+                value = sum(child_values[index - 1]
+                            for index in metadata
+                            if 0 <= index - 1 < child_count)
+            if not stack:
+                return metadata_sum, value
+            stack[-1][2].append(value)
+    except StopIteration:
+        raise ValueError('input ends before the root node') from None
+
+
+# The numbers mapped into memory by a process of the pool.
+_shared_numbers: Optional[memoryview] = None
+
+
+def _map_numbers(path: str) -> None:
+    """Maps the numbers stored in a file into the memory of the process."""
+    import mmap  # pylint: disable=C0415
+    global _shared_numbers  # pylint: disable=W0603
+    with open(path, 'rb') as numbers_file:
+        buffer = mmap.mmap(numbers_file.fileno(), 0, access=mmap.ACCESS_READ)
+    _shared_numbers = memoryview(buffer).cast('i')
+
+
+def _evaluate_subtree(bounds: Tuple[int, int]) -> Tuple[int, int]:
+    """Computes the metadata sum and value of a subtree of the mapped numbers.
+
+    Args:
+        bounds: The start index of the subtree and of the next node.
+
+    Returns:
+        A pair of integers representing the sum of all metadata in the subtree
+        and the value of its root.
+    """
+    start, stop = bounds
+    tree = CompactTree.load(_shared_numbers[start:stop])
+    return tree.metadata_sum(), tree.node_values()[0]
+
+
+@cache.cached(ignore=['processes'])
+@memory.measured
+def get_parallel_sum_and_value(
+        input_string: str,
+        processes: Optional[int] = None) -> Tuple[int, int]:
+    """Computes the metadata sum and root value evaluating subtrees in parallel.
+
+    Args:
+        input_string: The puzzle input.
+        processes: The number of processes evaluating subtrees. Defaults to the
+            number of processors on the machine.
+
+    Returns:
+        A pair of integers representing the sum of all metadata in the node
+        tree and the value of the root node.
+    """
+    import concurrent.futures  # pylint: disable=C0415
+    import tempfile  # pylint: disable=C0415
+    numbers = _read_numbers(input_string)
+    child_count = numbers[0]
+    bounds = []
+    index = 2
+    for _ in range(child_count):
+        stop = _skip_subtree(numbers, index)
+        bounds.append((index, stop))
+        index = stop
+    metadata = numbers[index:index + numbers[1]].tolist()
+    if not child_count:
+        return sum(metadata), sum(metadata)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'numbers')
+        with open(path, 'wb') as numbers_file:
+            numbers.tofile(numbers_file)
+        with concurrent.futures.ProcessPoolExecutor(
+                processes, initializer=_map_numbers,
+                initargs=(path,)) as executor:
+            results = list(
+                executor.map(_evaluate_subtree,
+                             bounds,
+                             chunksize=max(1, child_count // 64)))
+
+    metadata_sum = sum(metadata) + sum(result[0] for result in results)
+    root_value = sum(results[index - 1][1]
+                     for index in metadata
+                     if 0 < index <= child_count)
+    return metadata_sum, root_value
+
+
 def _run_tests() -> None:
     """Tests solution."""
-    assert get_metadata_sum('2 3 0 3 10 11 12 1 1 0 1 99 2 1 1 2') == 138
-    assert get_root_value('2 3 0 3 10 11 12 1 1 0 1 99 2 1 1 2') == 66
+    for compact in (False, True):
+        assert get_metadata_sum('2 3 0 3 10 11 12 1 1 0 1 99 2 1 1 2',
+                                compact) == 138
+        assert get_root_value('2 3 0 3 10 11 12 1 1 0 1 99 2 1 1 2',
+                              compact) == 66
+    compact_tree = CompactTree.load(
+        _read_numbers('2 3 0 3 10 11 12 1 1 0 1 99 2 1 1 2'))
+    assert list(compact_tree.child_counts) == [2, 0, 1, 0]
+    assert list(compact_tree.first_children) == [1, 3, 3, 4]
+    assert compact_tree.metadata(3) == [99]
+    assert compact_tree.node_values() == [66, 33, 0, 99]
+    assert _read_numbers(' 2 3\n0  3\n').tolist() == [2, 3, 0, 3]
+    # Numbers that do not fit in the array are rejected by every backend.
+    for backend in backends.get_available_backends():
+        with backends.use(backend):
+            for number in ('3000000000', '-3000000000'):
+                try:
+                    solve(f'0 1 {number}')
+                    raise AssertionError(f'{number} read by {backend}')
+                except OverflowError:
+                    pass
+    tree = _build_tree(_read_numbers('2 3 0 3 10 11 12 1 1 0 1 99 2 1 1 2'))
+    assert tree.header == (2, 3)
+    assert tree.metadata == [1, 1, 2]
+    assert tree.children[1].children[0].metadata == [99]
+    depth = 100000
+    deep_tree = ' '.join(['1 1'] * depth + ['0 1'] + ['1'] * (depth + 1))
+    for compact in (False, True):
+        assert get_metadata_sum(deep_tree, compact) == depth + 1
+        assert get_root_value(deep_tree, compact) == 1
+    height = 200
+    repeated_tree = ' '.join(['1 2'] * height + ['0 1'] + ['1'] *
+                             (2 * height + 1))
+    for compact in (False, True):
+        assert get_root_value(repeated_tree, compact) == 2**height
+    assert get_sum_and_value([repeated_tree]) == (2 * height + 1, 2**height)
+    assert get_sum_and_value(
+        ['2 3 0 3 10 11 12 1 1 0 1 99 2 1 1 2']) == (138, 66)
+    assert get_sum_and_value(
+        [b'2 3 0 3 1', b'0 11 12 1 1 0 1 ', b'99 2 1', b' 1 2\n']) == (138, 66)
+    assert get_sum_and_value([deep_tree]) == (depth + 1, 1)
+    assert list(
+        solve_batch(['2 3 0 3 10 11 12 1 1 0 1 99 2 1 1 2', deep_tree],
+                    pool='process',
+                    workers=2)) == [(138, 66), (depth + 1, 1)]
+    assert get_parallel_sum_and_value('2 3 0 3 10 11 12 1 1 0 1 99 2 1 1 2',
+                                      processes=2) == (138, 66)
+    assert get_parallel_sum_and_value('0 3 1 2 3') == (6, 6)
+    wide_tree = ' '.join(['1000 3'] + ['1 1 0 1 5 1'] * 1000 + ['1 1000 2000'])
+    assert get_parallel_sum_and_value(wide_tree, processes=2) == (9001, 10)
+    assert _skip_subtree(_read_numbers(wide_tree), 2) == 8
+    try:
+        get_sum_and_value(['2 3 0 3 10 11 12'])
+        assert False
+    except ValueError:
+        pass
 
 
 def _print_answers(metadata_sum: int, root_value: int) -> None:
@@ -189,11 +726,8 @@ def _print_answers(metadata_sum: int, root_value: int) -> None:
 
 
 def main() -> None:
-    """Runs tests and prints answers to day's puzzle."""
-    _run_tests()
-    input_string = utils.read_input(8)
-    metadata_sum = get_metadata_sum(input_string)
-    root_value = get_root_value(input_string)
+    """Prints answers to day's puzzle."""
+    metadata_sum, root_value = get_sum_and_value(utils.stream_input(8))
     _print_answers(metadata_sum, root_value)
 
 
@@ -0,0 +1,151 @@
+"""Checks that all backends give identical answers on generated inputs.
+
+Each case generates random puzzle inputs for a day and solves them with every
+available backend (see the backends module), with the result cache bypassed.
+Any difference between backends fails the check.
+
+Run this command from the root of the repository to check many inputs:
+
+    python3 -m solutions.differential
+"""
+
+import random
+import string
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from . import backends, cache, day02, day03, day06, day08
+
+
+def _generate_box_ids(rng: random.Random) -> str:
+    """Generates box IDs of the same length with many repeated letters."""
+    length = rng.randint(1, 12)
+    letters = string.ascii_lowercase[:rng.randint(1, 8)]
+    return '\n'.join(''.join(rng.choice(letters)
+                             for _ in range(length))
+                     for _ in range(rng.randint(1, 50)))
+
+
+def _generate_claims(rng: random.Random) -> str:
+    """Generates claims, most of them overlapping, that fit in the fabric."""
+    lines = []
+    for claim_id in range(1, rng.randint(1, 40) + 1):
+        x, y = rng.randrange(0, 990), rng.randrange(0, 990)
+        if rng.random() < 0.8:
+            x, y = rng.randrange(0, 20), rng.randrange(0, 20)
+        width, height = rng.randint(1, 10), rng.randint(1, 10)
+        lines.append(f'#{claim_id} @ {x},{y}: {width}x{height}')
+    return '\n'.join(lines)
+
+
+def _generate_coordinates(rng: random.Random) -> str:
+    """Generates distinct coordinates in a small area."""
+    size = rng.randint(2, 40)
+    cells = rng.sample(range(size * size), rng.randint(1, min(30, size * size)))
+    return '\n'.join(f'{cell % size}, {cell // size}' for cell in cells)
+
+
+def _generate_tree(rng: random.Random) -> str:
+    """Generates a node tree whose metadata often reference children."""
+    numbers = []
+    # Each entry holds the quantity of children left to generate and the
+    # quantity of metadata entries of a node.
+    stack = []
+    while True:
+        if not stack or (stack[-1][0] and len(stack) < 6):
+            if stack:
+                stack[-1][0] -= 1
+            child_count, metadata_count = rng.randint(0, 3), rng.randint(1, 4)
+            numbers += [child_count, metadata_count]
+            stack.append([child_count, metadata_count])
+        elif stack[-1][0]:
+            stack[-1][0] -= 1
+            numbers += [0, 1, rng.randint(1, 9)]
+        else:
+            _, metadata_count = stack.pop()
+            numbers += [rng.randint(1, 4) for _ in range(metadata_count)]
+            if not stack:
+                return ' '.join(map(str, numbers))
+
+
+class _Case(NamedTuple):  # pylint: disable=R0903
+    """Represents answers to compare for generated inputs.
+
+    Attributes:
+        name: The name of the case.
+        generate: A function generating a puzzle input from a random generator.
+        solve: A function computing answers from a puzzle input.
+    """
+    name: str
+    generate: Callable[[random.Random], str]
+    solve: Callable[[str], Any]
+
+
+_CASES = [
+    _Case('day02', _generate_box_ids, day02.get_checksum),
+    _Case('day03', _generate_claims, day03.solve),
+    _Case('day06', _generate_coordinates,
+          lambda input_string: (day06.get_largest_finite_area(input_string),
+                                day06.get_largest_finite_area(
+                                    input_string, 'matrix'))),
+    _Case('day08', _generate_tree, day08.solve),
+]
+
+
+def compare_backends(solve: Callable[[str], Any], input_string: str) -> Any:
+    """Solves an input with every available backend and compares answers.
+
+    Args:
+        solve: A function computing answers from a puzzle input.
+        input_string: The puzzle input.
+
+    Returns:
+        The answers, identical for all backends.
+
+    Raises:
+        AssertionError: Some backends gave different answers.
+    """
+    answers: Dict[str, Any] = {}
+    with cache.bypass():
+        for backend in backends.get_available_backends():
+            with backends.use(backend):
+                answers[backend] = solve(input_string)
+    if len({repr(answer) for answer in answers.values()}) > 1:
+        raise AssertionError(f'backends disagree on {input_string!r}: '
+                             f'{answers}')
+    return answers[backends.PYTHON]
+
+
+def run(seed: int = 0, count: int = 100, names: List[str] = None) -> None:
+    """Compares backends on generated inputs.
+
+    Args:
+        seed: The seed of the random generator.
+        count: The number of inputs generated for each case.
+        names: The names of the cases to run. Defaults to all cases.
+
+    Raises:
+        AssertionError: Some backends gave different answers.
+    """
+    rng = random.Random(seed)
+    for case in _CASES:
+        if names is not None and case.name not in names:
+            continue
+        for _ in range(count):
+            compare_backends(case.solve, case.generate(rng))
+
+
+def _run_tests() -> None:
+    """Tests backends."""
+    assert compare_backends(
+        day03.solve, '#1 @ 1,3: 4x4\n#2 @ 3,1: 4x4\n#3 @ 5,5: 2x2') == (4, 3)
+    run(count=10)
+
+
+def main() -> None:
+    """Compares backends on many generated inputs."""
+    run(count=200)
+    print('All backends agree.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+"""Measures how much memory each phase of a solution uses.
+
+Solutions split their work into phases: parsing the input, building data
+structures such as matrices, and computing answers. Instrumentation is opt-in
+and configured through environment variables:
+
+    AOC_MEMORY_REPORT: When set to a non-empty value, a report is printed to
+        standard error at the end of each phase.
+    AOC_MEMORY_BUDGET: The maximum quantity of memory, in bytes, that solutions
+        may allocate while instrumented. Setting it enables instrumentation.
+
+Reports can also be collected with the record context manager, and the budget
+overridden with the limit context manager.
+
+Memory is traced with tracemalloc, which only sees allocations made while it is
+tracing, so peaks are measured from the start of the outermost phase. The
+maximum resident set size of the process, from resource.getrusage, is reported
+alongside when available. Phases can nest, in which case the figures of a phase
+include those of the phases nested in it. Tracing is global to the process, so
+phases running in several threads at once give meaningless figures. Memory
+allocated in other processes, such as the workers of a pool, is not counted.
+
+When the budget is exceeded, MemoryBudgetExceeded is raised, either before a
+large allocation announced with reserve, or at the end of the phase in which the
+budget was exceeded. Solutions with a low-memory engine catch it to switch to
+that engine; others let it abort.
+"""
+
+import contextlib
+import contextvars
+import functools
+import os
+import sys
+from typing import Callable, Iterator, List, NamedTuple, Optional
+
+from . import utils
+
+_REPORT_VARIABLE = 'AOC_MEMORY_REPORT'
+_BUDGET_VARIABLE = 'AOC_MEMORY_BUDGET'
+
+# The reports collected by record, or None outside of record.
+_reports = contextvars.ContextVar('reports', default=None)
+# The budget set by limit, or _FROM_ENVIRONMENT outside of limit.
+_FROM_ENVIRONMENT = object()
+_budget = contextvars.ContextVar('budget', default=_FROM_ENVIRONMENT)
+_function = contextvars.ContextVar('function', default='')
+# The phases currently running, innermost last.
+_phases = contextvars.ContextVar('phases', default=())
+
+
+class PhaseReport(NamedTuple):
+    """Represents the memory used by a phase of a solution.
+
+    Attributes:
+        function: The qualified name of the solution the phase is part of, or
+            an empty string outside of any measured solution.
+        phase: The name of the phase, such as 'parse', 'build' or 'compute'.
+        peak: The most memory allocated at once during the phase, in bytes,
+            over what was allocated when it started.
+        retained: The memory still allocated at the end of the phase, in
+            bytes, over what was allocated when it started.
+        max_rss: The maximum resident set size of the process so far, in
+            bytes, or None if it is not available.
+    """
+    function: str
+    phase: str
+    peak: int
+    retained: int
+    max_rss: Optional[int]
+
+    def __str__(self) -> str:
+        max_rss = ('unknown' if self.max_rss is None else
+                   f'{self.max_rss / (1 << 20):.1f} MiB')
+        return (f'{self.function or "-"} {self.phase}: '
+                f'peak {self.peak / (1 << 20):.1f} MiB, '
+                f'retained {self.retained / (1 << 20):.1f} MiB, '
+                f'max RSS {max_rss}')
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """Raised when a solution needs more memory than the budget allows.
+
+    Attributes:
+        needed: The quantity of memory needed, in bytes.
+        budget: The budget, in bytes.
+    """
+
+    def __init__(self, needed: int, budget: int) -> None:
+        super().__init__(f'{needed} bytes needed, over the budget of '
+                         f'{budget} bytes')
+        self.needed = needed
+        self.budget = budget
+
+    def __reduce__(self):
+        # Rebuilds the error from both arguments when it is unpickled, for
+        # instance after being raised in the worker of a process pool.
+        return type(self), (self.needed, self.budget)
+
+
+class _Frame:  # pylint: disable=R0903
+    """Represents a running phase.
+
+    Attributes:
+        name: The name of the phase.
+        start: The memory traced when the phase started.
+        peak: The highest peak traced during the phase, before the last time
+            the peak was reset by a nested phase.
+    """
+    __slots__ = ('name', 'start', 'peak')
+
+    def __init__(self, name: str, start: int) -> None:
+        self.name = name
+        self.start = start
+        self.peak = start
+
+
+def get_budget() -> Optional[int]:
+    """Provides the memory budget.
+
+    Returns:
+        The budget in bytes, or None if memory is not limited.
+    """
+    budget = _budget.get()
+    if budget is not _FROM_ENVIRONMENT:
+        return budget
+    budget = os.environ.get(_BUDGET_VARIABLE)
+    return int(budget) if budget else None
+
+
+def is_enabled() -> bool:
+    """Checks whether phases are instrumented."""
+    return bool(
+        _reports.get() is not None or os.environ.get(_REPORT_VARIABLE) or
+        get_budget() is not None)
+
+
+def _get_max_rss() -> Optional[int]:
+    """Provides the maximum resident set size of the process in bytes."""
+    try:
+        import resource  # pylint: disable=C0415
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux counts kibibytes, macOS counts bytes.
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def _check_budget(needed: int) -> None:
+    """Raises MemoryBudgetExceeded if needed exceeds the budget."""
+    budget = get_budget()
+    if budget is not None and needed > budget:
+        raise MemoryBudgetExceeded(needed, budget)
+
+
+def reserve(size: int) -> None:
+    """Checks that a large allocation fits in the budget before making it.
+
+    Does nothing unless a phase is running with a budget.
+
+    Args:
+        size: The estimated size of the allocation in bytes.
+
+    Raises:
+        MemoryBudgetExceeded: The allocation would exceed the budget.
+    """
+    if not _phases.get() or get_budget() is None:
+        return
+    import tracemalloc  # pylint: disable=C0415
+    _check_budget(tracemalloc.get_traced_memory()[0] + size)
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Measures the memory used by a phase, inside a with statement.
+
+    Can also decorate a function, to measure each of its calls. Does nothing
+    unless instrumentation is enabled, or if a phase of the same name is
+    already running, so that recursive or repeated helpers are measured once.
+
+    Args:
+        name: The name of the phase.
+
+    Raises:
+        MemoryBudgetExceeded: The phase exceeded the budget.
+    """
+    phases = _phases.get()
+    if (phases and phases[-1].name == name) or not is_enabled():
+        yield
+        return
+
+    import tracemalloc  # pylint: disable=C0415
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        # NumPy is imported before tracing starts, so that the memory taken by
+        # its modules is not counted against the first phase using it.
+        utils.get_numpy()
+        tracemalloc.start()
+    current, peak = tracemalloc.get_traced_memory()
+    if phases:
+        phases[-1].peak = max(phases[-1].peak, peak)
+    tracemalloc.reset_peak()
+    frame = _Frame(name, current)
+    token = _phases.set(phases + (frame,))
+    exceeded = False
+    try:
+        yield
+    except MemoryBudgetExceeded:
+        exceeded = True
+        raise
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, frame.peak)
+        budget = get_budget()
+        exceeded = exceeded or (budget is not None and peak > budget)
+        _phases.reset(token)
+        if phases:
+            # Enclosing phases are not charged for an excess that is already
+            # raised, so that they can recover from it, for instance by
+            # switching to a low-memory engine.
+            phases[-1].peak = max(phases[-1].peak,
+                                  current if exceeded else peak)
+        if started_tracing:
+            tracemalloc.stop()
+        _report(
+            PhaseReport(_function.get(), name, peak - frame.start,
+                        current - frame.start, _get_max_rss()))
+    _check_budget(peak)
+
+
+def _report(report: PhaseReport) -> None:
+    """Collects and prints a report as configured."""
+    reports = _reports.get()
+    if reports is not None:
+        reports.append(report)
+    if os.environ.get(_REPORT_VARIABLE):
+        print(f'memory: {report}', file=sys.stderr)
+
+
+def measured(function: Callable) -> Callable:
+    """Measures each call to a solution as a whole, as a 'total' phase.
+
+    Phases running during the call are reported as part of the solution.
+
+    Args:
+        function: The solution to measure.
+
+    Returns:
+        The measured solution.
+    """
+    name = f'{function.__module__.rpartition(".")[2]}.{function.__qualname__}'
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not is_enabled():
+            return function(*args, **kwargs)
+        token = _function.set(name)
+        try:
+            with phase('total'):
+                return function(*args, **kwargs)
+        finally:
+            _function.reset(token)
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def record() -> Iterator[List[PhaseReport]]:
+    """Instruments phases inside a with statement and collects their reports.
+
+    Yields:
+        The list the reports are appended to, in the order phases end.
+    """
+    reports = []
+    token = _reports.set(reports)
+    try:
+        yield reports
+    finally:
+        _reports.reset(token)
+
+
+@contextlib.contextmanager
+def limit(budget: Optional[int]) -> Iterator[None]:
+    """Sets the memory budget inside a with statement.
+
+    Args:
+        budget: The budget in bytes, or None to lift the budget set by the
+            environment.
+    """
+    token = _budget.set(budget)
+    try:
+        yield
+    finally:
+        _budget.reset(token)
+
+
+def _run_tests() -> None:
+    """Tests memory instrumentation."""
+    import pickle  # pylint: disable=C0415
+
+    @measured
+    def get_answer(size: int) -> int:
+        with phase('parse'):
+            numbers = list(range(size))
+        with phase('build'):
+            reserve(size * 8)
+            squares = [number * number for number in numbers]
+        with phase('compute'):
+            with phase('compute'):
+                return sum(squares)
+
+    with limit(None):
+        assert get_answer(10) == 285
+        with limit(1), limit(None):
+            assert get_budget() is None
+        error = pickle.loads(pickle.dumps(MemoryBudgetExceeded(2, 1)))
+        assert (error.needed, error.budget) == (2, 1)
+        with record() as reports:
+            assert get_answer(100000) == 333328333350000
+        assert [report.phase for report in reports
+               ] == ['parse', 'build', 'compute', 'total']
+        assert all(report.function.endswith('.get_answer')
+                   for report in reports)
+        parse, build, _, total = reports
+        # A list of 100000 integers takes more than 800 kB.
+        assert parse.retained > 800000 and build.retained > 800000
+        assert total.peak >= parse.retained + build.retained
+        assert total.retained < parse.retained
+        with record() as reports, limit(1000000):
+            try:
+                get_answer(100000)
+                raise AssertionError('budget not enforced')
+            except MemoryBudgetExceeded as error:
+                assert error.budget == 1000000
+            assert [report.phase for report in reports] == ['parse', 'total']
+            assert get_answer(10) == 285
+            with phase('build'):
+                try:
+                    reserve(1000000)
+                    raise AssertionError('budget not enforced')
+                except MemoryBudgetExceeded as error:
+                    assert error.needed > 1000000
+
+
+def main() -> None:
+    """Runs tests."""
+    _run_tests()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,72 @@
 """A set of utility functions for the Advent of Code."""
 
+import functools
 import os
+from types import ModuleType
+from typing import Iterator, Optional
 
 
-def read_input(day: int) -> str:
-    """Reads the input file of the given day.
+def _get_input_path(day: int) -> str:
+    """Provides the path to the input file of the given day.
 
     Args:
         day: An integer representing the day.
 
     Returns:
-        The contents of the day's input file as a string.
+        The path to the day's input file.
     """
     # Assumes the input file is ../inputs/dayXX.txt relative to this source file's directory, where
     # XX is a two-digit representation of day.
     sourcedir = os.path.dirname(__file__)
-    inputpath = f'{sourcedir}/../inputs/day{day:02d}.txt'
-    with open(inputpath) as inputfile:
+    return f'{sourcedir}/../inputs/day{day:02d}.txt'
+
+
+@functools.lru_cache(maxsize=None)
+def get_numpy() -> Optional[ModuleType]:
+    """Imports NumPy on first use.
+
+    NumPy is optional and slow to import, so solutions only import it when they
+    need it.
+
+    Returns:
+        The numpy module, or None if NumPy is not installed.
+    """
+    try:
+        import numpy  # pylint: disable=C0415
+    except ImportError:
+        return None
+    return numpy
+
+
+def read_input(day: int) -> str:
+    """Reads the input file of the given day.
+
+    Args:
+        day: An integer representing the day.
+
+    Returns:
+        The contents of the day's input file as a string.
+    """
+    with open(_get_input_path(day)) as inputfile:
         contents = inputfile.read().strip()
     return contents
+
+
+def stream_input(day: int, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+    """Reads the input file of the given day in chunks.
+
+    Unlike read_input, the contents are not stripped: surrounding whitespace is
+    left to the consumer.
+
+    Args:
+        day: An integer representing the day.
+        chunk_size: The maximum number of bytes in each chunk.
+
+    Yields:
+        The contents of the day's input file as consecutive chunks of bytes.
+    """
+    with open(_get_input_path(day), 'rb') as inputfile:
+        chunk = inputfile.read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = inputfile.read(chunk_size)